@@ -1,11 +1,16 @@
 
+import hashlib
 import os
+import pickle
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
+import networkx as nx
 import osmnx as ox
 import pandas as pd
 import geopandas as gpd
 import numpy as np
+from pyproj import Transformer
 from shapely.geometry import box
 
 # ---------------------------
@@ -19,28 +24,103 @@ GTFS_FEEDS = [
 OUTPUT = os.path.join(DATA_DIR, "network_data")
 os.makedirs(OUTPUT, exist_ok=True)
 
+# Bboxes wider or taller than this (degrees) are downloaded as a grid of
+# tiles, so no single Overpass query hits its time or memory limits.
+# Overpass allows only a couple of concurrent requests per client and
+# OSMnx's rate-limit pause assumes one at a time, so keep TILE_WORKERS <= 2.
+TILE_DEG = 0.25
+TILE_WORKERS = 2
+# Same buffer graph_from_polygon downloads around the requested polygon
+TILE_BUFFER_M = 500
+
 
 # ---------------------------
 # BUILD WALK GRAPH
 # ---------------------------
-def build_walk_graph(bbox, network_type="walk"):
+def build_walk_graph(bbox, network_type="walk", tile_deg=TILE_DEG):
     """
     Build a walking graph for the given bbox (north, south, east, west).
     The graph is projected to a metric CRS.
+
+    Bboxes larger than tile_deg on a side are downloaded in tiles (see
+    _graph_from_tiles); pass a smaller tile_deg to force tiling.
+
+    The projected graph is cached in OUTPUT, keyed on the bbox, network
+    type, OSMnx version and (when tiled) tile size, so later runs skip the
+    download and projection.
     """
     north, south, east, west = bbox
+    tiled = north - south > tile_deg or east - west > tile_deg
+    key_parts = (tuple(bbox), network_type, ox.__version__) + ((tile_deg,) if tiled else ())
+    key = hashlib.sha1(repr(key_parts).encode()).hexdigest()[:12]
+    cache_path = os.path.join(OUTPUT, f"walk_graph_{key}.pkl")
+    if os.path.exists(cache_path):
+        print("Loading cached walking graph from", cache_path)
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+
     print("Building walking graph using polygon bbox…")
 
     # Create polygon from bbox
     poly = box(west, south, east, north)
 
     # Build in lat/lon
-    G = ox.graph_from_polygon(poly, network_type=network_type)
+    if tiled:
+        G = _graph_from_tiles(poly, network_type, tile_deg)
+    else:
+        G = ox.graph_from_polygon(poly, network_type=network_type)
 
     # Project to a metric CRS
     G = ox.project_graph(G)
 
+    with open(cache_path, "wb") as f:
+        pickle.dump(G, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return G
+
+
+def _graph_from_tiles(poly, network_type, tile_deg=TILE_DEG):
+    """
+    Download the graph for a large polygon as tile_deg tiles in parallel and
+    stitch them together, then clean it up the way graph_from_polygon does.
+    """
+    # Tile the buffered polygon, as graph_from_polygon downloads it, so nodes
+    # near the outer edge are simplified and counted the same way
+    poly_buff = ox.utils_geo.buffer_geometry(poly, TILE_BUFFER_M)
+    west, south, east, north = poly_buff.bounds
+    lats = np.linspace(south, north, int(np.ceil((north - south) / tile_deg)) + 1)
+    lons = np.linspace(west, east, int(np.ceil((east - west) / tile_deg)) + 1)
+    tiles = [
+        box(lons[j], lats[i], lons[j + 1], lats[i + 1])
+        for i in range(len(lats) - 1)
+        for j in range(len(lons) - 1)
+    ]
+    print(f"Downloading {len(tiles)} tiles…")
+
+    # Tiles stay unsimplified and keep edges crossing their border, so the
+    # neighbouring tiles overlap. OSM node ids are global, so composing them
+    # merges the shared nodes and edges.
+    def fetch(tile):
+        return ox.graph_from_polygon(
+            tile, network_type=network_type, simplify=False, retain_all=True, truncate_by_edge=True
+        )
+
+    with ThreadPoolExecutor(max_workers=TILE_WORKERS) as pool:
+        G_buff = nx.compose_all(pool.map(fetch, tiles))
+
+    G_buff = ox.truncate.truncate_graph_polygon(G_buff, poly_buff)
+    G_buff = ox.truncate.largest_component(G_buff)
+    G_buff = ox.simplify_graph(G_buff)
+    G = ox.truncate.truncate_graph_polygon(G_buff, poly)
+    G = ox.truncate.largest_component(G)
+
+    # Street counts from the stitched graph, so border intersections keep
+    # their true counts
+    spn = ox.stats.count_streets_per_node(G_buff, nodes=G.nodes)
+    nx.set_node_attributes(G, values=spn, name="street_count")
     return G
+
+
 # def build_walk_graph(network_type="walk"):
 #     print("Building walking graph for Boulder…")
 
@@ -62,62 +142,53 @@ def load_gtfs_stops(feed_path: str) -> pd.DataFrame:
     """
     print("Loading GTFS stops from", feed_path)
 
+    required_cols = ["stop_id", "stop_name", "stop_lat", "stop_lon"]
+
+    # Only the needed columns are parsed; pandas raises ValueError if any
+    # of them is missing
     with zipfile.ZipFile(feed_path, "r") as zf:
         with zf.open("stops.txt") as f:
-            df = pd.read_csv(f)
-
-    required_cols = ["stop_id", "stop_name", "stop_lat", "stop_lon"]
-    missing = [c for c in required_cols if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing columns in {feed_path}: {missing}")
+            try:
+                df = pd.read_csv(
+                    f,
+                    usecols=required_cols,
+                    dtype={"stop_id": str, "stop_name": str, "stop_lat": "float64", "stop_lon": "float64"},
+                )
+            except ValueError as e:
+                raise ValueError(f"Could not read stops from {feed_path}: {e}") from e
 
     return df[required_cols]
 
 
 # ---------------------------
-# SNAP STOPS TO GRAPH (NUMPY NEAREST)
+# SNAP STOPS TO GRAPH (KD-TREE NEAREST)
 # ---------------------------
 def snap_stops_to_graph(G, stops_df: pd.DataFrame) -> gpd.GeoDataFrame:
     """
     Given a projected graph G and a DataFrame of GTFS stops (lat/lon),
     project stops to the graph CRS and find the nearest node for each
-    using pure NumPy distance calculations (no scipy/sklearn).
+    with one batched KD-tree query.
     """
-    # GTFS stops in WGS84
-    stops_g = gpd.GeoDataFrame(
-        stops_df,
-        geometry=gpd.points_from_xy(stops_df.stop_lon, stops_df.stop_lat),
-        crs="EPSG:4326",
-    )
-
-    # Project stops to same CRS as graph
     graph_crs = G.graph.get("crs", None)
     if graph_crs is None:
         raise ValueError("Graph has no CRS set in G.graph['crs']")
 
-    stops_proj = stops_g.to_crs(graph_crs)
+    # Project stop lon/lat to the graph CRS in one array transform
+    lon = stops_df["stop_lon"].to_numpy(dtype=np.float64)
+    lat = stops_df["stop_lat"].to_numpy(dtype=np.float64)
+    sx, sy = Transformer.from_crs(4326, graph_crs, always_xy=True).transform(lon, lat)
 
-    # Get nodes GeoDataFrame (already in graph CRS)
-    nodes = ox.graph_to_gdfs(G, nodes=True, edges=False)
+    print("Snapping stops to nearest graph nodes (KD-tree)…")
 
-    # Precompute node coordinates as NumPy arrays
-    node_ids = np.array(nodes.index)
-    node_x = nodes.geometry.x.to_numpy()
-    node_y = nodes.geometry.y.to_numpy()
+    # One batched lookup; OSMnx builds a KD-tree over the projected nodes
+    nearest_ids = ox.distance.nearest_nodes(G, X=sx, Y=sy)
 
-    nearest_ids = []
-    print("Snapping stops to nearest graph nodes (NumPy)…")
-
-    # For each stop, find nearest node by Euclidean distance
-    for pt in stops_proj.geometry:
-        x, y = pt.x, pt.y
-        dx = node_x - x
-        dy = node_y - y
-        dist2 = dx * dx + dy * dy
-        idx = np.argmin(dist2)
-        nearest_ids.append(node_ids[idx])
-
-    # Store mapping back on original (lat/lon) GeoDataFrame
+    # GTFS stops in WGS84, with the mapping to graph nodes
+    stops_g = gpd.GeoDataFrame(
+        stops_df,
+        geometry=gpd.points_from_xy(lon, lat),
+        crs="EPSG:4326",
+    )
     stops_g["nearest_node"] = nearest_ids
     return stops_g
 
@@ -128,9 +199,9 @@ def snap_stops_to_graph(G, stops_df: pd.DataFrame) -> gpd.GeoDataFrame:
 def main():
     # Smaller bounding box around central Denver
     # bbox = (north, south, east, west)
-   # (north, south, east, west)
-   bbox = (40.12, 39.90, -105.10, -105.30)
-   # bbox = (40.09, 39.95, -105.18, -105.32)
+    # (north, south, east, west)
+    bbox = (40.12, 39.90, -105.10, -105.30)
+    # bbox = (40.09, 39.95, -105.18, -105.32)
 
 
 
@@ -147,17 +218,19 @@ def main():
             raise FileNotFoundError(f"GTFS file not found: {feed}")
         all_stops.append(load_gtfs_stops(feed))
 
-    stops_df = (
-        pd.concat(all_stops)
-        .drop_duplicates(subset=["stop_id"])
-        .reset_index(drop=True)
+    # First feed wins on shared stop_ids; the index is rebuilt in the same
+    # passes instead of a separate reset_index copy
+    stops_df = pd.concat(all_stops, ignore_index=True).drop_duplicates(
+        subset="stop_id", ignore_index=True
     )
 
     # 3) Snap stops to graph
     stops_gdf = snap_stops_to_graph(G, stops_df)
-    stops_path = os.path.join(OUTPUT, "stops.geojson")
-    stops_gdf.to_file(stops_path, driver="GeoJSON")
-    print("Saved stops.geojson to", stops_path)
+    # FlatGeobuf: binary and much quicker to read back than GeoJSON. No
+    # spatial index, so features keep their order.
+    stops_path = os.path.join(OUTPUT, "stops.fgb")
+    stops_gdf.to_file(stops_path, driver="FlatGeobuf", SPATIAL_INDEX="NO")
+    print("Saved stops.fgb to", stops_path)
 
 
 if __name__ == "__main__":
@@ -1,24 +1,43 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+import asyncio
+import gc
+import logging
 import os
-import networkx as nx
+from dataclasses import asdict, dataclass
+import httpx
 import geopandas as gpd
 import numpy as np
+import orjson
 import osmnx as ox
-from shapely.geometry import Point
-import requests
+from pyproj import Transformer
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
 from datetime import datetime
 import polyline
 
+try:
+    from pypolyline.cutil import decode_polyline
+except ImportError:  # fall back to the pure-Python decoder
+    decode_polyline = None
+
 from weather_service import get_weather_and_alerts
 from events_service import events_near_route
 import raptor_engine
 
+logging.basicConfig(format="%(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("bouldermove")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
 DATA_DIR = "data"
 OUTPUT = os.path.join(DATA_DIR, "network_data")
 
-app = FastAPI(title="BoulderMove Routing API")
+# Responses carry long lat/lon point lists; orjson renders them much faster
+# than the stdlib encoder.
+app = FastAPI(title="BoulderMove Routing API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,26 +48,102 @@ app.add_middleware(
 )
 
 # ------------------------------- GLOBALS -----------------------------------
-G = None
-nodes_gdf = None
 node_ids = None
 node_x = None
 node_y = None
-stops_gdf = None
+node_lat = None
+node_lon = None
+node_id_to_idx = None
+node_tree = None
+walk_csr = None
+walk_csr_rev = None
+anchor_rows = None
+anchor_preds = None
+anchor_preds_rev = None
+stop_ids = None
+stop_tree = None
+stop_index = None
+stop_nearest_node = None
+stop_lat_arr = None
+stop_lon_arr = None
 graph_crs = None
+to_graph_tf = None
 raptor = None
 
+# Every walking leg starts or ends at a stop's nearest graph node ("anchor").
+# Shortest-path trees rooted at every anchor are precomputed at startup, so a
+# query only walks a predecessor array. Persisted between restarts.
+ANCHOR_TREES_PATH = os.path.join(OUTPUT, "anchor_trees.npz")
+
+# GTFS stops snapped to the walk graph, written by build_network.py
+STOPS_PATH = os.path.join(OUTPUT, "stops.fgb")
+
+# Routing arrays extracted from walk_graph.graphml; parsing the GraphML takes
+# seconds, loading this snapshot milliseconds. Plain arrays (the CSR's
+# indptr/indices/weights plus node ids and coordinates), no pickles.
+WALK_GRAPH_SNAPSHOT = os.path.join(OUTPUT, "walk_graph.npz")
+
 # ------------------------------- ML API -----------------------------------
 ML_URL = "https://bouldermove-ml-499631536778.us-central1.run.app/score_route"
 
+# Shared async client: keeps connections to the ML service and Google alive
+# across requests instead of reconnecting on every call. Failed connection
+# attempts are retried by the transport.
+http = httpx.AsyncClient(
+    timeout=10,
+    transport=httpx.AsyncHTTPTransport(
+        retries=3,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=10),
+    ),
+)
+
+
+@dataclass(slots=True)
+class RouteFeatures:
+    """Model input row; mirrors RouteFeatures in ml_service/app.py."""
+    duration_min: float
+    buffer_min: float
+    num_transfers: int
+    rain_1h: float
+    snow_1h: float
+    wind_speed: float
+    temp: float
+    event_risk: float
+    hour: int
+    is_weekend: bool
+
+
+def route_features(duration_min, num_transfers, weather, events):
+    """Feature row for a route, given its formatted weather and nearby events."""
+    w = weather or _EMPTY_WX
+    now = datetime.now()
+
+    return RouteFeatures(
+        duration_min=float(duration_min),
+        buffer_min=5.0,
+        num_transfers=int(num_transfers),
+        rain_1h=float(w["rain_1h"]),
+        snow_1h=float(w["snow_1h"]),
+        wind_speed=float(w["wind_speed"]),
+        temp=float(w["temp"]),
+        event_risk=1.0 if len(events) > 0 else 0.0,
+        hour=now.hour,
+        is_weekend=now.weekday() >= 5,
+    )
 
-def score_route(features: dict):
+
+async def score_route(features: RouteFeatures):
     try:
-        print("➡ ML INPUT:", features)
-        r = requests.post(ML_URL, json=features, timeout=10)
+        logger.debug("ML input: %s", features)
+        # orjson serialises the slotted dataclass directly, no dict round-trip
+        r = await http.post(
+            ML_URL,
+            content=orjson.dumps(features),
+            headers={"Content-Type": "application/json"},
+        )
         r.raise_for_status()
-        out = r.json()
-        print("⬅ ML OUTPUT:", out)
+        out = orjson.loads(r.content)
+        logger.debug("ML output: %s", out)
 
         return {
             "prob_on_time": out.get("prob_on_time"),
@@ -56,7 +151,7 @@ def score_route(features: dict):
         }
 
     except Exception as e:
-        print("❌ ML scoring failed:", e)
+        logger.warning("ML scoring failed: %s", e)
         return {"prob_on_time": None, "expected_delay_min": None}
 
 
@@ -75,84 +170,301 @@ class PlanTransitRequest(BaseModel):
 # ------------------------------- LOAD DATA --------------------------------
 @app.on_event("startup")
 def load_data():
-    global G, nodes_gdf, node_ids, node_x, node_y, stops_gdf, graph_crs, raptor
-
-    print("Loading walking graph…")
-    G = ox.load_graphml(os.path.join(OUTPUT, "walk_graph.graphml"))
-    graph_crs = G.graph["crs"]
-
-    nodes = ox.graph_to_gdfs(G, nodes=True, edges=False).to_crs(graph_crs)
-    nodes_gdf = nodes
-    node_ids = np.array(nodes.index)
-    node_x = nodes.geometry.x.to_numpy()
-    node_y = nodes.geometry.y.to_numpy()
-
-    print("Loading stops…")
-    stops = gpd.read_file(os.path.join(OUTPUT, "stops.geojson"))
+    global node_ids, node_x, node_y, node_lat, node_lon, node_id_to_idx, node_tree
+    global walk_csr, walk_csr_rev, anchor_rows, anchor_preds, anchor_preds_rev
+    global stop_ids, stop_tree, stop_index, stop_nearest_node, stop_lat_arr, stop_lon_arr
+    global graph_crs, to_graph_tf, raptor
+
+    logger.info("Loading walking graph…")
+    graph = load_walk_graph()
+    graph_crs = graph["graph_crs"]
+    to_graph_tf = Transformer.from_crs(4326, graph_crs, always_xy=True)
+
+    node_ids = graph["node_ids"]
+    node_x = graph["node_x"]
+    node_y = graph["node_y"]
+    node_lat = graph["node_lat"]
+    node_lon = graph["node_lon"]
+    node_tree = cKDTree(np.column_stack([node_x, node_y]))
+    node_id_to_idx = {nid: i for i, nid in enumerate(node_ids)}
+    walk_csr = graph["csr"]
+    walk_csr_rev = walk_csr.T.tocsr()
+    del graph
+    # A GraphML cold start leaves the parsed MultiDiGraph behind; NetworkX's
+    # cached views make it cyclic, so free it now instead of at the next GC.
+    gc.collect()
+
+    logger.info("Loading stops…")
+    stops = gpd.read_file(STOPS_PATH)
     stops["stop_id"] = stops["stop_id"].astype(str)
 
-    stops_proj = stops.to_crs(graph_crs)
-    stops["_x_proj"] = stops_proj.geometry.x
-    stops["_y_proj"] = stops_proj.geometry.y
-    stops_gdf = stops
-
-    print("Loading RAPTOR engine…")
+    # Project with the shared transformer in one call instead of to_crs
+    stop_x, stop_y = to_graph_tf.transform(stops.geometry.x.to_numpy(), stops.geometry.y.to_numpy())
+    stop_tree = cKDTree(np.column_stack([stop_x, stop_y]))
+    stop_ids = stops["stop_id"].to_numpy()
+    stop_index = {sid: i for i, sid in enumerate(stop_ids)}
+    stop_nearest_node = stops["nearest_node"].to_numpy(dtype=np.int64)
+    stop_lat_arr = stops["stop_lat"].to_numpy(dtype=np.float64)
+    stop_lon_arr = stops["stop_lon"].to_numpy(dtype=np.float64)
+
+    logger.info("Loading stop walking trees…")
+    anchors = np.unique([node_id_to_idx[n] for n in stop_nearest_node]).astype(np.int32)
+    anchor_preds, anchor_preds_rev = load_anchor_trees(anchors)
+    anchor_rows = {int(a): i for i, a in enumerate(anchors)}
+
+    logger.info("Loading RAPTOR engine…")
     raptor = raptor_engine.RaptorEngine(
         gtfs_feeds=[
             os.path.join(DATA_DIR, "gtfs_rtd.zip"),
             os.path.join(DATA_DIR, "gtfs_bustang.zip"),
         ],
-        stops_geojson_path=os.path.join(OUTPUT, "stops.geojson"),
+        stops_geojson_path=STOPS_PATH,
     )
 
-    print("Backend startup complete.")
+    logger.info("Backend startup complete.")
+
+
+@app.on_event("shutdown")
+async def close_http():
+    await http.aclose()
 
 
 # ------------------------------- HELPERS ----------------------------------
 def nearest_graph_node(lat, lon):
-    pt = gpd.GeoSeries([Point(lon, lat)], crs="EPSG:4326").to_crs(graph_crs)[0]
-    dx = node_x - pt.x
-    dy = node_y - pt.y
-    return node_ids[np.argmin(dx * dx + dy * dy)]
+    x, y = to_graph_tf.transform(lon, lat)
+    _, idx = node_tree.query([x, y], k=1)
+    return node_ids[idx]
+
+
+def load_walk_graph():
+    """
+    Routing arrays for the walking graph: CSR adjacency, node ids, projected
+    and lat/lon node coordinates, and the graph CRS. Read from
+    WALK_GRAPH_SNAPSHOT when it is newer than the GraphML; otherwise the
+    GraphML is parsed and the snapshot rewritten.
+    """
+    graphml_path = os.path.join(OUTPUT, "walk_graph.graphml")
+    if os.path.exists(WALK_GRAPH_SNAPSHOT) and (
+        os.path.getmtime(WALK_GRAPH_SNAPSHOT) >= os.path.getmtime(graphml_path)
+    ):
+        with np.load(WALK_GRAPH_SNAPSHOT) as z:
+            n = len(z["node_ids"])
+            return {
+                "csr": csr_matrix((z["weights"], z["indices"], z["indptr"]), shape=(n, n)),
+                "node_ids": z["node_ids"],
+                "node_x": z["node_x"],
+                "node_y": z["node_y"],
+                "node_lat": z["node_lat"],
+                "node_lon": z["node_lon"],
+                "graph_crs": str(z["graph_crs"]),
+            }
+
+    G = ox.load_graphml(graphml_path)
+    graph_crs = G.graph["crs"]
+
+    # Node ids and projected x/y straight from the node attributes; no
+    # GeoDataFrame or Point geometries needed
+    n_nodes = G.number_of_nodes()
+    node_ids = np.fromiter(G.nodes, dtype=np.int64, count=n_nodes)
+    node_x = np.fromiter((x for _, x in G.nodes(data="x")), dtype=np.float64, count=n_nodes)
+    node_y = np.fromiter((y for _, y in G.nodes(data="y")), dtype=np.float64, count=n_nodes)
+    # One array transform instead of a GeoDataFrame to_crs round-trip
+    node_lon, node_lat = Transformer.from_crs(graph_crs, 4326, always_xy=True).transform(
+        node_x, node_y
+    )
+
+    graph = {
+        "csr": build_walk_csr(G, {nid: i for i, nid in enumerate(node_ids)}),
+        "node_ids": node_ids,
+        "node_x": node_x,
+        "node_y": node_y,
+        "node_lat": node_lat,
+        "node_lon": node_lon,
+        "graph_crs": graph_crs,
+    }
+    csr = graph["csr"]
+    try:
+        np.savez_compressed(
+            WALK_GRAPH_SNAPSHOT,
+            indptr=csr.indptr,
+            indices=csr.indices,
+            weights=csr.data,
+            node_ids=node_ids,
+            node_x=node_x,
+            node_y=node_y,
+            node_lat=node_lat,
+            node_lon=node_lon,
+            graph_crs=np.array(str(graph_crs)),
+        )
+    except OSError as e:
+        logger.warning("Could not save walk graph snapshot: %s", e)
+    return graph
+
+
+def build_walk_csr(graph, id_to_idx):
+    """
+    Convert the walking MultiDiGraph into a CSR adjacency matrix weighted by
+    edge length. Parallel edges keep their shortest length.
+    """
+    n_edges = graph.number_of_edges()
+    u = np.empty(n_edges, dtype=np.int64)
+    v = np.empty(n_edges, dtype=np.int64)
+    w = np.empty(n_edges, dtype=np.float64)
+    for i, (a, b, length) in enumerate(graph.edges(data="length")):
+        u[i] = id_to_idx[a]
+        v[i] = id_to_idx[b]
+        w[i] = length
+
+    # csr_matrix sums duplicate entries, so drop all but the shortest edge
+    order = np.lexsort((w, v, u))
+    u, v, w = u[order], v[order], w[order]
+    first = np.ones(n_edges, dtype=bool)
+    first[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+
+    n = len(id_to_idx)
+    return csr_matrix((w[first], (u[first], v[first])), shape=(n, n))
+
+
+def load_anchor_trees(anchors):
+    """
+    Predecessor matrices (one int32 row per anchor) of the shortest-path
+    trees rooted at each anchor, over forward and reversed edges. Reads
+    ANCHOR_TREES_PATH when it matches the current graph and anchors,
+    otherwise computes them and saves the file.
+    """
+    if os.path.exists(ANCHOR_TREES_PATH):
+        with np.load(ANCHOR_TREES_PATH) as cached:
+            preds = cached["preds"]
+            if (
+                np.array_equal(cached["anchors"], anchors)
+                and preds.shape[1] == walk_csr.shape[0]
+                and int(cached["nnz"]) == walk_csr.nnz
+            ):
+                preds_rev = cached["preds_rev"] if "preds_rev" in cached else preds
+                return preds, preds_rev
+
+    _, preds = dijkstra(walk_csr, indices=anchors, return_predecessors=True)
+    preds = preds.astype(np.int32)
+    arrays = {"anchors": anchors, "nnz": walk_csr.nnz, "preds": preds}
+
+    # Walk graphs are usually symmetric (up to float noise in edge lengths);
+    # then both trees are interchangeable.
+    if abs(walk_csr - walk_csr_rev).max() < 1e-6:
+        preds_rev = preds
+    else:
+        _, preds_rev = dijkstra(walk_csr_rev, indices=anchors, return_predecessors=True)
+        preds_rev = preds_rev.astype(np.int32)
+        arrays["preds_rev"] = preds_rev
+
+    try:
+        np.savez(ANCHOR_TREES_PATH, **arrays)
+    except OSError as e:
+        logger.warning("Could not save anchor trees: %s", e)
+    return preds, preds_rev
+
+
+def anchor_predecessors(anchor_idx, reverse):
+    """
+    Shortest-path tree rooted at an anchor's graph node index, as a
+    predecessor array. With reverse=True the tree is over reversed edges, so
+    following predecessors from any node leads *to* the anchor.
+    """
+    row = anchor_rows[anchor_idx]
+    return anchor_preds_rev[row] if reverse else anchor_preds[row]
+
+
+def _follow_predecessors(preds, start, root):
+    path = [start]
+    while path[-1] != root:
+        nxt = preds[path[-1]]
+        if nxt < 0:
+            return None
+        path.append(int(nxt))
+    return path
+
+
+def walk_to_anchor(source, anchor):
+    """
+    Shortest walking path from a graph node id to an anchor node id, as a
+    list of node ids. Returns [] if the anchor is unreachable.
+    """
+    anchor_idx = node_id_to_idx[anchor]
+    preds = anchor_predecessors(anchor_idx, True)
+    path = _follow_predecessors(preds, node_id_to_idx[source], anchor_idx)
+    return node_ids[path].tolist() if path else []
+
+
+def walk_from_anchor(anchor, target):
+    """
+    Shortest walking path from an anchor node id to a graph node id, as a
+    list of node ids. Returns [] if the target is unreachable.
+    """
+    anchor_idx = node_id_to_idx[anchor]
+    preds = anchor_predecessors(anchor_idx, False)
+    path = _follow_predecessors(preds, node_id_to_idx[target], anchor_idx)
+    return node_ids[path[::-1]].tolist() if path else []
 
 
 def path_to_latlon(path):
-    if not path:
-        return []
-    nodes = nodes_gdf.loc[path].to_crs(epsg=4326)
-    return [{"lat": row.geometry.y, "lon": row.geometry.x} for _, row in nodes.iterrows()]
+    """Coordinates of a node-id path as an (N, 2) array of lat/lon."""
+    idxs = np.fromiter((node_id_to_idx[p] for p in path), dtype=np.int64, count=len(path))
+    return np.column_stack([node_lat[idxs], node_lon[idxs]])
+
+
+def latlon_dicts(coords):
+    """(N, 2) lat/lon array -> [{"lat", "lon"}, ...] for JSON responses."""
+    return [{"lat": lat, "lon": lon} for lat, lon in coords.tolist()]
 
 
 def nearest_gtfs_stop(lat, lon):
-    pt = gpd.GeoSeries([Point(lon, lat)], crs="EPSG:4326").to_crs(graph_crs)[0]
-    dx = stops_gdf["_x_proj"].to_numpy() - pt.x
-    dy = stops_gdf["_y_proj"].to_numpy() - pt.y
-    idx = np.argmin(dx * dx + dy * dy)
-    return str(stops_gdf.iloc[idx]["stop_id"])
+    x, y = to_graph_tf.transform(lon, lat)
+    _, idx = stop_tree.query([x, y], k=1)
+    return str(stop_ids[idx])
+
+
+def decode_points(encoded: str):
+    """
+    Decode a Google encoded polyline into an (N, 2) array of lat/lon.
+    Uses the compiled pypolyline decoder when installed.
+    """
+    if decode_polyline is None:
+        return np.asarray(polyline.decode(encoded), dtype=np.float64).reshape(-1, 2)
+    # pypolyline yields (lon, lat) pairs
+    lonlat = np.asarray(decode_polyline(encoded.encode(), 5), dtype=np.float64).reshape(-1, 2)
+    return lonlat[:, ::-1]
+
+
+# Fields copied from the weather service's "current" block, with the value
+# used when one is missing.
+_WX_DEFAULTS = {
+    "temp": None,
+    "feels_like": None,
+    "humidity": None,
+    "weather_main": None,
+    "weather_desc": None,
+    "wind_speed": None,
+    "rain_1h": 0,
+    "snow_1h": 0,
+}
+
+# Stand-in for the model's weather features when no weather is available
+_EMPTY_WX = {"rain_1h": 0, "snow_1h": 0, "wind_speed": 0, "temp": 0}
 
 
 def format_weather(raw):
     if not raw:
         return None
     current = raw.get("current", {})
-    return {
-        "temp": current.get("temp"),
-        "feels_like": current.get("feels_like"),
-        "humidity": current.get("humidity"),
-        "weather_main": current.get("weather_main"),
-        "weather_desc": current.get("weather_desc"),
-        "wind_speed": current.get("wind_speed"),
-        "rain_1h": current.get("rain_1h", 0),
-        "snow_1h": current.get("snow_1h", 0),
-        "custom_alerts": raw.get("custom_alerts", []),
-    }
+    out = {k: current.get(k, d) for k, d in _WX_DEFAULTS.items()}
+    out["custom_alerts"] = raw.get("custom_alerts", [])
+    return out
 
 
 # ---------------------- GOOGLE FALLBACK (TRANSIT) -------------------------
-def google_transit_route(origin: Location, destination: Location):
+async def google_transit_route(origin: Location, destination: Location):
     key = os.getenv("GOOGLE_MAPS_API_KEY")
     if not key:
-        print("[GOOGLE BACKUP] Missing API key.")
+        logger.warning("Google transit fallback: missing API key")
         return None
 
     url = (
@@ -163,89 +475,85 @@ def google_transit_route(origin: Location, destination: Location):
     )
 
     try:
-        r = requests.get(url, timeout=6)
-        data = r.json()
+        r = await http.get(url, timeout=6)
+        data = orjson.loads(r.content)
 
         if data.get("routes"):
             overview = data["routes"][0]["overview_polyline"]["points"]
-            coords = polyline.decode(overview)
-            return [{"lat": lat, "lon": lon} for lat, lon in coords]
+            return decode_points(overview)
 
         return None
     except Exception as e:
-        print("[GOOGLE BACKUP ERROR]", e)
+        logger.warning("Google transit fallback failed: %s", e)
         return None
 
 
 # --------------------------- MAIN API -------------------------------------
 @app.post("/plan_transit_full")
-def plan_transit_full(req: PlanTransitRequest):
+async def plan_transit_full(req: PlanTransitRequest):
     """
     Walk -> transit -> walk routing with RAPTOR, plus weather, events, and ML scoring.
     Falls back to Google Transit if RAPTOR finds no journey.
+
+    Weather only depends on the origin, so it is fetched while the route is
+    computed; CPU-bound routing runs in worker threads to keep the event loop free.
     """
+    weather_task = asyncio.create_task(
+        asyncio.to_thread(get_weather_and_alerts, req.origin.lat, req.origin.lon)
+    )
+    try:
+        return await _plan_with_weather(req, weather_task)
+    finally:
+        # On early returns and errors the task is never awaited: cancel it,
+        # or retrieve its exception if it already failed, so nothing leaks
+        # into the "exception was never retrieved" log
+        if not weather_task.cancel() and not weather_task.cancelled():
+            weather_task.exception()
+
+
+async def _plan_with_weather(req: PlanTransitRequest, weather_task):
     departure_iso = req.depart_at or datetime.now().replace(microsecond=0).isoformat()
-    print("Using departure time:", departure_iso)
+    logger.debug("departure=%s", departure_iso)
 
     # ORIGIN / DESTINATION STOPS
     origin_stop = nearest_gtfs_stop(req.origin.lat, req.origin.lon)
-    origin_match = stops_gdf.loc[stops_gdf["stop_id"] == origin_stop]
+    origin_i = stop_index[origin_stop]
 
     dest_stop = nearest_gtfs_stop(req.destination.lat, req.destination.lon)
-    dest_match = stops_gdf.loc[stops_gdf["stop_id"] == dest_stop]
+    dest_i = stop_index[dest_stop]
 
     # WALK TO FIRST STOP
-    walk1_path = nx.shortest_path(
-        G,
+    walk1_path = await asyncio.to_thread(
+        walk_to_anchor,
         nearest_graph_node(req.origin.lat, req.origin.lon),
-        int(origin_match["nearest_node"].iloc[0]),
-        weight="length",
+        int(stop_nearest_node[origin_i]),
     )
-    walk1_latlon = path_to_latlon(walk1_path)
-    print("[DEBUG] walk1_latlon points:", len(walk1_latlon))
+    walk1_xy = path_to_latlon(walk1_path)
+    walk1_latlon = latlon_dicts(walk1_xy)
+    logger.debug("walk1 pts=%d", len(walk1_latlon))
 
     # TRANSIT (RAPTOR)
-    transit_legs = raptor.plan(origin_stop, dest_stop, departure_iso)
-    print("[DEBUG] transit_legs:", len(transit_legs))
+    transit_legs = await asyncio.to_thread(raptor.plan, origin_stop, dest_stop, departure_iso)
+    logger.debug("transit legs=%d", len(transit_legs))
 
     # ----------------- FALLBACK IF RAPTOR FAILS -------------------
     if not transit_legs or len(transit_legs) == 0:
-        print("⚠ RAPTOR FAILED → Using Google Transit API fallback")
-        google_geom = google_transit_route(req.origin, req.destination)
+        logger.warning("RAPTOR found no journey, using Google Transit fallback")
+        google_xy = await google_transit_route(req.origin, req.destination)
 
-        if not google_geom:
+        if google_xy is None or len(google_xy) == 0:
             return {"error": "No route found by RAPTOR or Google Maps."}
 
-        weather = format_weather(get_weather_and_alerts(req.origin.lat, req.origin.lon))
-        events = events_near_route([(p["lat"], p["lon"]) for p in google_geom])
-
-        duration_min = 0.0  # unknown; could be improved later
-        num_transfers = 0
-        buffer_min = 5
-
-        rain_1h = weather.get("rain_1h", 0) if weather else 0
-        snow_1h = weather.get("snow_1h", 0) if weather else 0
-        wind_speed = weather.get("wind_speed", 0) if weather else 0
-        temp = weather.get("temp", 0) if weather else 0
-        event_risk = 1.0 if events else 0.0
-
-        hour = datetime.now().hour
-        is_weekend = datetime.now().weekday() >= 5
-
-        features = {
-            "duration_min": float(duration_min),
-            "buffer_min": float(buffer_min),
-            "num_transfers": int(num_transfers),
-            "rain_1h": float(rain_1h),
-            "snow_1h": float(snow_1h),
-            "wind_speed": float(wind_speed),
-            "temp": float(temp),
-            "event_risk": float(event_risk),
-            "hour": int(hour),
-            "is_weekend": bool(is_weekend),
-        }
+        raw_weather, events = await asyncio.gather(
+            weather_task,
+            asyncio.to_thread(events_near_route, google_xy),
+        )
+        weather = format_weather(raw_weather)
+
+        # duration unknown; could be improved later
+        features = route_features(0.0, 0, weather, events)
 
-        ml_output = score_route(features)
+        ml_output = await score_route(features)
 
         return {
             "mode": "google_transit_fallback",
@@ -254,70 +562,46 @@ def plan_transit_full(req: PlanTransitRequest):
             "walk_to_stop": [],
             "transit": [],
             "walk_to_destination": [],
-            "geometry": google_geom,
+            "geometry": latlon_dicts(google_xy),
             "weather": weather,
             "events_nearby": events,
             "on_time_probability": ml_output.get("prob_on_time"),
             "expected_delay_min": ml_output.get("expected_delay_min"),
-            "ml_features_used": features,
+            "ml_features_used": asdict(features),
         }
 
     # ----------------- NORMAL RAPTOR FLOW --------------------------
     # RAPTOR geometry (stops along the route)
-    transit_geometry = []
-    for leg in transit_legs:
-        for sid in leg["intermediate_stops"]:
-            row = stops_gdf.loc[stops_gdf["stop_id"] == sid].iloc[0]
-            transit_geometry.append(
-                {"lat": row["stop_lat"], "lon": row["stop_lon"]}
-            )
-    print("[DEBUG] transit_geometry points:", len(transit_geometry))
+    stop_rows = [stop_index[sid] for leg in transit_legs for sid in leg["intermediate_stops"]]
+    transit_xy = np.column_stack([stop_lat_arr[stop_rows], stop_lon_arr[stop_rows]])
+    logger.debug("transit pts=%d", len(transit_xy))
 
     # WALK TO DESTINATION
-    walk3_path = nx.shortest_path(
-        G,
-        int(dest_match["nearest_node"].iloc[0]),
+    walk3_path = await asyncio.to_thread(
+        walk_from_anchor,
+        int(stop_nearest_node[dest_i]),
         nearest_graph_node(req.destination.lat, req.destination.lon),
-        weight="length",
     )
-    walk3_latlon = path_to_latlon(walk3_path)
-    print("[DEBUG] walk3_latlon points:", len(walk3_latlon))
+    walk3_xy = path_to_latlon(walk3_path)
+    walk3_latlon = latlon_dicts(walk3_xy)
+    logger.debug("walk3 pts=%d", len(walk3_latlon))
 
     # WEATHER + EVENTS (now that geometry exists)
-    weather = format_weather(get_weather_and_alerts(req.origin.lat, req.origin.lon))
-    full_geometry = walk1_latlon + transit_geometry + walk3_latlon
-    print("[DEBUG] full_geometry points:", len(full_geometry))
+    full_xy = np.vstack([walk1_xy, transit_xy, walk3_xy])
+    logger.debug("full pts=%d", len(full_xy))
 
-    events = events_near_route([(p["lat"], p["lon"]) for p in full_geometry])
+    raw_weather, events = await asyncio.gather(
+        weather_task,
+        asyncio.to_thread(events_near_route, full_xy),
+    )
+    weather = format_weather(raw_weather)
 
     # ------------------ ML FEATURE EXTRACTION ----------------------
     duration_min = sum(leg.get("duration_min", 0) for leg in transit_legs)
     num_transfers = max(0, len(transit_legs) - 1)
-    buffer_min = 5
-
-    rain_1h = weather.get("rain_1h", 0) if weather else 0
-    snow_1h = weather.get("snow_1h", 0) if weather else 0
-    wind_speed = weather.get("wind_speed", 0) if weather else 0
-    temp = weather.get("temp", 0) if weather else 0
-    event_risk = 1.0 if len(events) > 0 else 0.0
-
-    hour = datetime.now().hour
-    is_weekend = datetime.now().weekday() >= 5
-
-    features = {
-        "duration_min": float(duration_min),
-        "buffer_min": float(buffer_min),
-        "num_transfers": int(num_transfers),
-        "rain_1h": float(rain_1h),
-        "snow_1h": float(snow_1h),
-        "wind_speed": float(wind_speed),
-        "temp": float(temp),
-        "event_risk": float(event_risk),
-        "hour": int(hour),
-        "is_weekend": bool(is_weekend),
-    }
+    features = route_features(duration_min, num_transfers, weather, events)
 
-    ml_output = score_route(features)
+    ml_output = await score_route(features)
 
     # ------------------ FINAL RESPONSE -----------------------------
     return {
@@ -329,21 +613,20 @@ def plan_transit_full(req: PlanTransitRequest):
         "walk_to_destination": walk3_latlon,
         "weather": weather,
         "events_nearby": events,
-        "geometry": full_geometry,
         "on_time_probability": ml_output.get("prob_on_time"),
         "expected_delay_min": ml_output.get("expected_delay_min"),
-        "ml_features_used": features,
+        "ml_features_used": asdict(features),
     }
 
 
 # ------------------------- GOOGLE DIRECTIONS PROXY ------------------------
 @app.get("/google_directions")
-def google_directions_proxy(
+async def google_directions_proxy(
     origin: str, destination: str, mode: str = "driving", alternatives: str = "false"
 ):
     api_key = os.getenv("GOOGLE_MAPS_API_KEY")
     if not api_key:
-        print("❌ Missing GOOGLE_MAPS_API_KEY")
+        logger.error("Missing GOOGLE_MAPS_API_KEY")
         return {"routes": [], "error": "missing_api_key"}
 
     url = "https://maps.googleapis.com/maps/api/directions/json"
@@ -355,55 +638,36 @@ def google_directions_proxy(
         "key": api_key,
     }
 
-    r = requests.get(url, params=params)
-    data = r.json()
+    r = await http.get(url, params=params)
+    data = orjson.loads(r.content)
 
     if data.get("status") != "OK" or not data.get("routes"):
         return {"status": data.get("status"), "routes": []}
 
-    # --- Decode geometry for map + events + ML ---
-    coords = polyline.decode(data["routes"][0]["overview_polyline"]["points"])
-    geometry = [{"lat": lat, "lon": lon} for lat, lon in coords]
+    # --- Decode geometry for events; clients already have the encoded polyline ---
+    coords = decode_points(data["routes"][0]["overview_polyline"]["points"])
 
     # --- Extract origin/destination lat/lon ---
     origin_lat, origin_lon = map(float, origin.split(","))
     dest_lat, dest_lon = map(float, destination.split(","))
 
-    # --- Weather ---
-    raw_weather = get_weather_and_alerts(origin_lat, origin_lon)
+    # --- Weather + events along route (concurrently) ---
+    raw_weather, events = await asyncio.gather(
+        asyncio.to_thread(get_weather_and_alerts, origin_lat, origin_lon),
+        asyncio.to_thread(events_near_route, coords),
+    )
     weather = format_weather(raw_weather)
 
-    # --- Events along route ---
-    events = events_near_route([(p["lat"], p["lon"]) for p in geometry])
-
     # --- ML scoring ---
     duration_sec = data["routes"][0]["legs"][0]["duration"]["value"]
     duration_min = duration_sec / 60.0 if duration_sec is not None else 0.0
 
-    rain_1h = weather.get("rain_1h", 0) if weather else 0
-    snow_1h = weather.get("snow_1h", 0) if weather else 0
-    wind_speed = weather.get("wind_speed", 0) if weather else 0
-    temp = weather.get("temp", 0) if weather else 0
-    event_risk = 1.0 if len(events) > 0 else 0.0
-
-    features = {
-        "duration_min": float(duration_min),
-        "buffer_min": 5.0,
-        "num_transfers": 0,
-        "rain_1h": float(rain_1h),
-        "snow_1h": float(snow_1h),
-        "wind_speed": float(wind_speed),
-        "temp": float(temp),
-        "event_risk": float(event_risk),
-        "hour": datetime.now().hour,
-        "is_weekend": datetime.now().weekday() >= 5,
-    }
+    features = route_features(duration_min, 0, weather, events)
 
-    ml_out = score_route(features)
+    ml_out = await score_route(features)
 
     return {
         "status": "OK",
-        "geometry": geometry,
         "routes": data["routes"],
         "origin_lat": origin_lat,
         "origin_lon": origin_lon,
@@ -413,7 +677,7 @@ def google_directions_proxy(
         "events_nearby": events,
         "on_time_probability": ml_out.get("prob_on_time"),
         "expected_delay_min": ml_out.get("expected_delay_min"),
-        "ml_features_used": features,
+        "ml_features_used": asdict(features),
     }
 
 
@@ -1,29 +1,69 @@
 # events_service.py
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import numpy as np
+import orjson
 import requests
-from geopy.distance import distance
-from polyline import decode
+from cachetools import TTLCache, cached
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger("bouldermove.events")
+
 TICKETMASTER_API_KEY = os.getenv("TICKETMASTER_API_KEY")
 CU_EVENTS_URL = "https://calendar.colorado.edu/api/2/events"
 
+EARTH_RADIUS_M = 6371000.0
+
+# Pooled keep-alive connections to Ticketmaster and the CU calendar, with
+# retries on connection errors and transient 5xx/429 responses.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504)),
+))
+HTTP_TIMEOUT_S = 5
+
+# Runs the Ticketmaster and CU requests side by side
+_fetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="events-fetch")
+
+# Event listings change over hours, so successful fetches are reused for a few
+# minutes: Ticketmaster per ~1 km cell of the route centre, CU as a single entry.
+EVENTS_CACHE_TTL_S = 300
+_ticketmaster_cache = TTLCache(maxsize=1024, ttl=EVENTS_CACHE_TTL_S)
+_cu_cache = TTLCache(maxsize=1, ttl=EVENTS_CACHE_TTL_S)
+
 # -----------------------------------------------------------
 # 1. Ticketmaster: Fetch events near route midpoint
 # -----------------------------------------------------------
-def fetch_ticketmaster_along_route(polyline_points, radius_km=20):
-    if not polyline_points or not TICKETMASTER_API_KEY:
-        print("Ticketmaster: No points or missing API key")
+def fetch_ticketmaster_along_route(route, radius_km=20):
+    """route: (N, 2) array of lat/lon."""
+    if len(route) == 0 or not TICKETMASTER_API_KEY:
+        logger.debug("Ticketmaster: No points or missing API key")
         return []
 
     # Use midpoint of route
-    lats = [p[0] for p in polyline_points]
-    lons = [p[1] for p in polyline_points]
-    center_lat = (min(lats) + max(lats)) / 2
-    center_lon = (min(lons) + max(lons)) / 2
+    center_lat = float(route[:, 0].min() + route[:, 0].max()) / 2
+    center_lon = float(route[:, 1].min() + route[:, 1].max()) / 2
+
+    try:
+        events = _ticketmaster_events(round(center_lat, 2), round(center_lon, 2), radius_km)
+        logger.debug("Ticketmaster: Found %d events", len(events))
+        return events
+
+    except Exception as ex:
+        logger.warning("Ticketmaster fetch error: %s", ex)
+        return []
+
 
+@cached(_ticketmaster_cache, lock=Lock())
+def _ticketmaster_events(center_lat, center_lon, radius_km):
     url = "https://app.ticketmaster.com/discovery/v2/events.json"
     params = {
         "apikey": TICKETMASTER_API_KEY,
@@ -34,109 +74,196 @@ def fetch_ticketmaster_along_route(polyline_points, radius_km=20):
         "sort": "date,asc"
     }
 
-    try:
-        r = requests.get(url, params=params)
-        r.raise_for_status()
-        data = r.json()
-        events_raw = data.get("_embedded", {}).get("events", [])
-        events = []
-
-        for e in events_raw:
-            venues = e.get("_embedded", {}).get("venues", [])
-            if not venues:
-                continue
-
-            venue = venues[0]
-            loc = venue.get("location", {})
-            lat = float(loc.get("latitude", 0))
-            lon = float(loc.get("longitude", 0))
-
-            capacity = venue.get("capacity")
-            if capacity is not None:
-                try:
-                    capacity = int(capacity)
-                    if capacity < 100:
-                        continue
-                except:
-                    pass
-
-            events.append({
-                "id": f"tm_{e.get('id')}",
-                "name": e.get("name"),
-                "venue_name": venue.get("name"),
-                "capacity": capacity,
-                "description": e.get("info") or "",
-                "date_time": e.get("dates", {}).get("start", {}).get("dateTime"),
-                "url": e.get("url"),
-                "lat": lat,
-                "lon": lon,
-                "source": "ticketmaster",
-            })
-
-        print(f"Ticketmaster: Found {len(events)} events")
-        return events
+    r = SESSION.get(url, params=params, timeout=HTTP_TIMEOUT_S)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
+    events_raw = data.get("_embedded", {}).get("events", [])
+    events = []
 
-    except Exception as ex:
-        print("Ticketmaster fetch error:", ex)
-        return []
+    for e in events_raw:
+        venues = e.get("_embedded", {}).get("venues", [])
+        if not venues:
+            continue
+
+        venue = venues[0]
+        loc = venue.get("location", {})
+        lat = float(loc.get("latitude", 0))
+        lon = float(loc.get("longitude", 0))
+
+        capacity = venue.get("capacity")
+        if capacity is not None:
+            try:
+                capacity = int(capacity)
+                if capacity < 100:
+                    continue
+            except:
+                pass
+
+        events.append({
+            "id": f"tm_{e.get('id')}",
+            "name": e.get("name"),
+            "venue_name": venue.get("name"),
+            "capacity": capacity,
+            "description": e.get("info") or "",
+            "date_time": e.get("dates", {}).get("start", {}).get("dateTime"),
+            "url": e.get("url"),
+            "lat": lat,
+            "lon": lon,
+            "source": "ticketmaster",
+        })
+
+    return events
 
 # -----------------------------------------------------------
 # 2. CU Boulder Calendar
 # -----------------------------------------------------------
 def fetch_cu():
     try:
-        r = requests.get(CU_EVENTS_URL, params={"days": 14})
-        data = r.json()
-        events = []
-
-        for e in data.get("events", []):
-            ev = e.get("event", {})
-            loc = ev.get("location", {})
-
-            events.append({
-                "id": f"cu_{ev.get('id', '')}",
-                "name": ev.get("title"),
-                "venue_name": loc.get("name", "CU Boulder"),
-                "description": ev.get("description", ""),
-                "date_time": ev.get("localist_start_time"),
-                "url": ev.get("url"),
-                "lat": float(loc.get("latitude", 0)),
-                "lon": float(loc.get("longitude", 0)),
-                "capacity": None,
-                "source": "cu_calendar",
-            })
-        return events
+        return _cu_events()
     except Exception as ex:
-        print("CU fetch error:", ex)
+        logger.warning("CU fetch error: %s", ex)
         return []
 
+
+@cached(_cu_cache, lock=Lock())
+def _cu_events():
+    r = SESSION.get(CU_EVENTS_URL, params={"days": 14}, timeout=HTTP_TIMEOUT_S)
+    data = orjson.loads(r.content)
+    events = []
+
+    for e in data.get("events", []):
+        ev = e.get("event", {})
+        loc = ev.get("location", {})
+
+        events.append({
+            "id": f"cu_{ev.get('id', '')}",
+            "name": ev.get("title"),
+            "venue_name": loc.get("name", "CU Boulder"),
+            "description": ev.get("description", ""),
+            "date_time": ev.get("localist_start_time"),
+            "url": ev.get("url"),
+            "lat": float(loc.get("latitude", 0)),
+            "lon": float(loc.get("longitude", 0)),
+            "capacity": None,
+            "source": "cu_calendar",
+        })
+    return events
+
 # -----------------------------------------------------------
-# 3. Match events along route using geodesic distance
+# 3. Match events along route using haversine distance
 # -----------------------------------------------------------
+def route_distances_m(event_latlon, route, block=256, stop_within_m=None):
+    """
+    Distance in meters from each event to its closest route point.
+    event_latlon: (E, 2) array of lat/lon, route: (P, 2) array of lat/lon.
+
+    Route points are processed in blocks keeping a running minimum, so at
+    most an (E, block) matrix is alive at a time. With stop_within_m, an
+    event stops being scanned once a block brings it within that distance;
+    its result is then the closest point found so far, not necessarily
+    along the whole route.
+    """
+    ev = np.radians(event_latlon)
+    pts = np.radians(route)
+
+    # The haversine term is monotonic in distance: minimise it, convert once
+    min_a = np.full(len(ev), np.inf)
+    active = np.arange(len(ev))
+    if stop_within_m is not None:
+        stop_a = np.sin(stop_within_m / (2 * EARTH_RADIUS_M)) ** 2
+    for start in range(0, len(pts), block):
+        if len(active) == 0:
+            break
+        blk = pts[start:start + block]
+        act = ev[active]
+        dlat = act[:, 0:1] - blk[:, 0]
+        dlon = act[:, 1:2] - blk[:, 1]
+        a = np.sin(dlat / 2) ** 2 + np.cos(act[:, 0:1]) * np.cos(blk[:, 0]) * np.sin(dlon / 2) ** 2
+        min_a[active] = np.minimum(min_a[active], a.min(axis=1))
+        if stop_within_m is not None:
+            active = active[min_a[active] > stop_a]
+
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(min_a, 1.0)))
+
+
+def decimate_route(route, spacing_m):
+    """
+    Keep route points roughly spacing_m apart along the path (plus the last
+    point). route: (N, 2) array of lat/lon.
+    """
+    if len(route) < 3:
+        return route
+    lat = np.radians(route[:, 0])
+    dy = np.diff(lat)
+    dx = np.diff(np.radians(route[:, 1])) * np.cos(lat[:-1])
+    cum = np.concatenate([[0.0], np.cumsum(np.hypot(dx, dy) * EARTH_RADIUS_M)])
+    idx = np.searchsorted(cum, np.arange(0.0, cum[-1], spacing_m))
+    return route[np.unique(np.append(idx, len(route) - 1))]
+
+
+def grid_cells(latlon, cell_lat, cell_lon, neighbours=False):
+    """
+    Integer keys of the grid cells containing each lat/lon point. With
+    neighbours=True, the unique keys of those cells and their 8 neighbours.
+    """
+    i = np.floor(latlon[:, 0] / cell_lat).astype(np.int64)
+    j = np.floor(latlon[:, 1] / cell_lon).astype(np.int64)
+    if not neighbours:
+        return i * 1_000_000 + j
+    return np.unique([
+        (i + di) * 1_000_000 + (j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)
+    ])
+
+
 def events_near_route(polyline_points, max_dist_m=1500):
-    """Return events near route within max_dist_m (meters)."""
-    if not polyline_points:
+    """
+    Return events near route within max_dist_m (meters).
+    polyline_points: (N, 2) array (or sequence) of lat/lon.
+
+    Distances are measured to route points resampled every max_dist_m / 2.
+    Every dropped point lies less than that far along the path past a kept
+    one, so distance_from_route_m can overstate the distance to the full
+    route's points by up to about max_dist_m / 2, and events near the
+    max_dist_m edge may be missed.
+    """
+    route = np.asarray(polyline_points, dtype=np.float64).reshape(-1, 2)
+    if len(route) == 0:
         return []
 
-    all_events = fetch_ticketmaster_along_route(polyline_points)
-    all_events.extend(fetch_cu())
+    tm_future = _fetch_pool.submit(fetch_ticketmaster_along_route, route)
+    cu_future = _fetch_pool.submit(fetch_cu)
+    all_events = tm_future.result() + cu_future.result()
 
     final_events = []
-    for ev in all_events:
-        pt_event = (ev["lat"], ev["lon"])
-        try:
-            # Check each polyline point
-            for pt_route in polyline_points:
-                pt_poly = (pt_route[0], pt_route[1])
-                d_m = distance(pt_event, pt_poly).meters
-                if d_m <= max_dist_m:
-                    ev["distance_from_route_m"] = round(d_m, 1)
-                    final_events.append(ev)
-                    break
-        except Exception as e:
-            continue
+    if all_events:
+        # Coordinates as dense arrays; the event dicts are only touched again
+        # for events that end up in range.
+        n = len(all_events)
+        ev_latlon = np.column_stack([
+            np.fromiter((ev["lat"] for ev in all_events), dtype=np.float64, count=n),
+            np.fromiter((ev["lon"] for ev in all_events), dtype=np.float64, count=n),
+        ])
+
+        pts = decimate_route(route, max_dist_m / 2)
+
+        # Cheap reject: bucket events and route points into grid cells at least
+        # max_dist_m on a side (a degree of longitude is shortest at the highest
+        # latitude involved). An event can only be in range of a route point in
+        # its own or a neighbouring cell, so skip the haversine for the rest.
+        cell_lat = np.degrees(1.01 * max_dist_m / EARTH_RADIUS_M)
+        cell_lon = cell_lat / np.cos(np.radians(np.abs(pts[:, 0]).max() + cell_lat))
+        near_cells = grid_cells(pts, cell_lat, cell_lon, neighbours=True)
+        candidates = np.flatnonzero(np.isin(grid_cells(ev_latlon, cell_lat, cell_lon), near_cells))
+
+        min_d = route_distances_m(ev_latlon[candidates], pts, stop_within_m=max_dist_m)
+        in_range = min_d <= max_dist_m
+        # The event dicts are shared through the fetch caches; don't mutate them
+        final_events = [
+            (all_events[i], round(d, 1))
+            for i, d in zip(candidates[in_range].tolist(), min_d[in_range].tolist())
+        ]
 
-    print(f"[DEBUG] Found {len(final_events)} events along route")
+    logger.debug("Found %d events along route", len(final_events))
 
     return {
         "count": len(final_events),
@@ -147,8 +274,8 @@ def events_near_route(polyline_points, max_dist_m=1500):
                 "date_time": ev["date_time"],
                 "url": ev["url"],
                 "source": ev["source"],
-                "distance_from_route_m": ev.get("distance_from_route_m"),
+                "distance_from_route_m": dist_m,
             }
-            for ev in final_events
+            for ev, dist_m in final_events
         ],
     }
@@ -1,17 +1,15 @@
+import io
+import os
 import psycopg2
+from dotenv import load_dotenv
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from tqdm import tqdm
+from datetime import datetime
 
 # ---------------- SQL CONNECTION ----------------
-conn = psycopg2.connect(
-    host="35.239.113.255",
-    dbname="bouldermove",
-    user="boulder_user",
-    password="RheaisMad",
-    port=5432,
-)
+# Same settings as train_route_model_from_sql.py: PG_DSN or the PG* variables
+load_dotenv()
+conn = psycopg2.connect(os.getenv("PG_DSN", ""))
 
 cur = conn.cursor()
 
@@ -68,8 +66,8 @@ print("\nAverage on_time probability:", on_time.mean())
 
 # ---------------- INSERT INTO SQL ----------------
 
-insert_query = """
-INSERT INTO trip_history (
+copy_query = """
+COPY trip_history (
     user_id,
     route_id,
     duration_min,
@@ -87,56 +85,50 @@ INSERT INTO trip_history (
     actual_arrival_ts,
     on_time
 )
-VALUES (
-    %s, %s,
-    %s, %s, %s,
-    %s, %s, %s,
-    %s, %s,
-    %s, %s,
-    %s, %s, %s,
-    %s
-);
+FROM STDIN WITH (FORMAT CSV, NULL '\\N');
 """
 
 print("\nInserting rows into SQL...")
 
-for _, row in tqdm(df.iterrows(), total=len(df)):
-
-    # generate timestamps
-    now = datetime.utcnow()
-
-    # scheduled_arrival = now + duration
-    scheduled_arrival = now + timedelta(minutes=float(row["duration_min"]))
-
-    # desired arrival = scheduled + buffer
-    desired_arrival = scheduled_arrival + timedelta(minutes=float(row["buffer_min"]))
-
-    # actual arrival = scheduled +- small random noise
-    actual_arrival = scheduled_arrival + timedelta(
-        minutes=float(np.random.normal(0, 5))
-    )
-
-    # convert numpy types → Python primitives
-    values = (
-        None,                     # user_id (nullable)
-        None,                     # route_id (nullable)
-        float(row["duration_min"]),
-        float(row["buffer_min"]),
-        int(row["num_transfers"]),
-        float(row["rain_1h"]),
-        float(row["snow_1h"]),
-        float(row["wind_speed"]),
-        float(row["temp"]),
-        float(row["event_risk"]),
-        int(row["hour"]),
-        bool(row["is_weekend"]),
-        desired_arrival,
-        scheduled_arrival,
-        actual_arrival,
-        bool(row["on_time"]),
-    )
-
-    cur.execute(insert_query, values)
+# generate timestamps for all rows at once (Postgres stores microseconds)
+now = pd.Timestamp(datetime.utcnow())
+
+# scheduled_arrival = now + duration
+scheduled_arrival = (now + pd.to_timedelta(df["duration_min"], unit="m")).dt.floor("us")
+
+# desired arrival = scheduled + buffer
+desired_arrival = (scheduled_arrival + pd.to_timedelta(df["buffer_min"], unit="m")).dt.floor("us")
+
+# actual arrival = scheduled +- small random noise
+actual_arrival = (
+    scheduled_arrival + pd.to_timedelta(np.random.normal(0, 5, size=N), unit="m")
+).dt.floor("us")
+
+# rows in the column order of copy_query
+rows = pd.DataFrame({
+    "user_id": None,              # nullable
+    "route_id": None,             # nullable
+    "duration_min": df["duration_min"],
+    "buffer_min": df["buffer_min"],
+    "num_transfers": df["num_transfers"],
+    "rain_1h": df["rain_1h"],
+    "snow_1h": df["snow_1h"],
+    "wind_speed": df["wind_speed"],
+    "temp": df["temp"],
+    "event_risk": df["event_risk"],
+    "hour": df["hour"],
+    "is_weekend": df["is_weekend"].astype(bool),
+    "desired_arrival_ts": desired_arrival,
+    "scheduled_arrival_ts": scheduled_arrival,
+    "actual_arrival_ts": actual_arrival,
+    "on_time": df["on_time"].astype(bool),
+})
+
+# stream everything through a single COPY instead of INSERT statements
+buf = io.StringIO()
+rows.to_csv(buf, index=False, header=False, na_rep="\\N")
+buf.seek(0)
+cur.copy_expert(copy_query, buf)
 
 conn.commit()
 cur.close()
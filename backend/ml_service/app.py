@@ -1,10 +1,57 @@
+import asyncio
+from typing import List
 from fastapi import FastAPI
 from pydantic import BaseModel
-from model_loader import load_model_and_features, score_route
+from model_loader import load_model_and_features, score_routes
 
 app = FastAPI(title="BoulderMove ML Scoring Service")
 
-model, feature_cols = load_model_and_features()
+model, feature_cols = None, None
+
+# Single /score_route requests are queued and scored together: the worker
+# waits up to BATCH_WINDOW_S after the first arrival, or until MAX_BATCH
+# requests are waiting, then makes one model call for all of them.
+BATCH_WINDOW_S = 0.005
+MAX_BATCH = 64
+_score_queue = None
+_batch_task = None
+
+
+# Loaded at startup rather than import, so reloader parent processes don't fetch it
+@app.on_event("startup")
+async def load_model():
+    global model, feature_cols, _score_queue, _batch_task
+    model, feature_cols = load_model_and_features()
+    _score_queue = asyncio.Queue()
+    _batch_task = asyncio.create_task(_batch_worker())
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    if _batch_task is not None:
+        _batch_task.cancel()
+
+
+async def _batch_worker():
+    while True:
+        batch = [await _score_queue.get()]
+        if _score_queue.qsize() < MAX_BATCH - 1:
+            await asyncio.sleep(BATCH_WINDOW_S)
+        while len(batch) < MAX_BATCH and not _score_queue.empty():
+            batch.append(_score_queue.get_nowait())
+
+        try:
+            results = score_routes([features for features, _ in batch], model, feature_cols)
+        except Exception as ex:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(ex)
+            continue
+
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
 
 class RouteFeatures(BaseModel):
     duration_min: float
@@ -18,9 +65,18 @@ class RouteFeatures(BaseModel):
     hour: int
     is_weekend: bool
 
+class RouteBatch(BaseModel):
+    items: List[RouteFeatures]
+
 @app.post("/score_route")
-def score_endpoint(features: RouteFeatures):
-    return score_route(features.dict(), model, feature_cols)
+async def score_endpoint(features: RouteFeatures):
+    fut = asyncio.get_running_loop().create_future()
+    await _score_queue.put((features.dict(), fut))
+    return await fut
+
+@app.post("/score_route_batch")
+def score_batch_endpoint(req: RouteBatch):
+    return {"results": score_routes([f.dict() for f in req.items], model, feature_cols)}
 
 @app.get("/")
 def root():
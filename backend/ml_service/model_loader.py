@@ -1,49 +1,131 @@
+import io
+import logging
 import os
-import json
+import threading
+from operator import itemgetter
 import numpy as np
+from google.api_core.exceptions import NotFound
 from google.cloud import storage
 from joblib import load
-from xgboost import Booster
+import onnxruntime as ort
+
+logger = logging.getLogger("bouldermove.ml")
 
 BUCKET_NAME = "bouldermove-ml-artifacts"
+MODEL_ONNX_PATH = "models/route_on_time_model.onnx"
+# Written by every training run; served only until the ONNX export exists
 MODEL_JSON_PATH = "models/route_on_time_model.json"
 FEATURE_COLS_PATH = "models/feature_cols.joblib"
 
+# Features are float32 in training and in the ONNX model's input
+FEATURE_DTYPE = np.float32
+
+LOCAL_MODEL_PATH = "/tmp/model.onnx"
+LOCAL_JSON_MODEL_PATH = "/tmp/model.json"
+LOCAL_FEAT_PATH = "/tmp/feat.joblib"
+
+# (ONNX Runtime session or JSON fallback, feature_cols) once loaded in this process
+_MODEL_CACHE = None
+
+# Per-thread input matrix, reused across score_routes calls. The batcher
+# runs on the event loop and /score_route_batch on the threadpool, so each
+# thread gets its own. Sized for the batcher's MAX_BATCH; grown if needed.
+BUFFER_ROWS = 64
+_tls = threading.local()
+
+
+def _fetch_cached(blob, local_path):
+    """
+    Bytes of a GCS blob, reusing local_path when its saved ETag (in
+    local_path + ".etag") still matches the blob's.
+    """
+    etag_path = local_path + ".etag"
+    blob.reload()
+
+    if os.path.exists(local_path) and os.path.exists(etag_path):
+        with open(etag_path) as f:
+            if f.read() == blob.etag:
+                with open(local_path, "rb") as f:
+                    return f.read()
+
+    data = blob.download_as_bytes()
+    with open(local_path, "wb") as f:
+        f.write(data)
+    with open(etag_path, "w") as f:
+        f.write(blob.etag)
+    return data
+
 
 def load_model_and_features():
+    global _MODEL_CACHE
+    if _MODEL_CACHE is not None:
+        return _MODEL_CACHE
+
     client = storage.Client()
     bucket = client.bucket(BUCKET_NAME)
 
-    # ---- Load XGBoost model JSON ----
-    blob_model = bucket.blob(MODEL_JSON_PATH)
-    with open("/tmp/model.json", "wb") as f:
-        blob_model.download_to_file(f)
-
-    booster = Booster()
-    booster.load_model("/tmp/model.json")
+    # ---- Load ONNX model ----
+    # Batches are small, so a single sequential thread per session
+    try:
+        raw_model = _fetch_cached(bucket.blob(MODEL_ONNX_PATH), LOCAL_MODEL_PATH)
+    except NotFound:
+        # Bucket predates the ONNX export (no retrain since): serve the JSON model
+        logger.warning("%s not found, falling back to %s", MODEL_ONNX_PATH, MODEL_JSON_PATH)
+        session = _BoosterSession(_fetch_cached(bucket.blob(MODEL_JSON_PATH), LOCAL_JSON_MODEL_PATH))
+    else:
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = 1
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        session = ort.InferenceSession(raw_model, sess_options=opts, providers=["CPUExecutionProvider"])
 
     # ---- Load feature columns ----
-    blob_feat = bucket.blob(FEATURE_COLS_PATH)
-    with open("/tmp/feat.joblib", "wb") as f:
-        blob_feat.download_to_file(f)
+    raw_feat = _fetch_cached(bucket.blob(FEATURE_COLS_PATH), LOCAL_FEAT_PATH)
+    feature_cols = load(io.BytesIO(raw_feat))
+
+    _MODEL_CACHE = (session, feature_cols)
+    return _MODEL_CACHE
+
 
-    feature_cols = load("/tmp/feat.joblib")
+class _BoosterSession:
+    """XGBoost JSON model behind the ONNX session's run() interface."""
 
-    return booster, feature_cols
-def score_route(features: dict, model, feature_cols):
-    import xgboost as xgb
+    def __init__(self, raw_model):
+        from xgboost import Booster
 
-    # Create row in correct order
-    x = np.array([[features[col] for col in feature_cols]], dtype=float)
+        self.booster = Booster()
+        self.booster.load_model(bytearray(raw_model))
+        self.booster.set_param({"predictor": "cpu_predictor"})
 
-    # Provide feature names so XGBoost Booster recognizes them
-    d = xgb.DMatrix(x, feature_names=feature_cols)
+    def run(self, output_names, inputs):
+        # Same (label, probabilities) outputs as the ONNX classifier
+        prob = self.booster.inplace_predict(inputs["input"])
+        return [(prob > 0.5).astype(np.int64), np.column_stack([1 - prob, prob])]
 
-    prob = float(model.predict(d)[0])
 
+def _score_result(prob):
     return {
         "prob_on_time": prob,
         "expected_delay_min": (1 - prob) * 15
     }
 
 
+def _thread_rows(feature_cols, n):
+    """This thread's first n input rows and a getter for a row's values."""
+    if getattr(_tls, "cols", None) is not feature_cols or len(_tls.buf) < n:
+        _tls.cols = feature_cols
+        _tls.buf = np.empty((max(n, BUFFER_ROWS), len(feature_cols)), dtype=FEATURE_DTYPE)
+        _tls.get = itemgetter(*feature_cols)
+    return _tls.buf[:n], _tls.get
+
+
+def score_routes(features_list, model, feature_cols):
+    """Score several feature dicts with one model call."""
+    # Rows in feature_cols order, matching the positional ONNX input
+    x, get_values = _thread_rows(feature_cols, len(features_list))
+    for i, features in enumerate(features_list):
+        x[i] = get_values(features)
+
+    # Outputs are (label, probabilities); take P(on_time)
+    probs = model.run(None, {"input": x})[1][:, 1]
+
+    return [_score_result(prob) for prob in probs.tolist()]
@@ -17,13 +17,42 @@ scan trips reachable from a stop after a given time and propagate earliest
 arrival times along trips.
 """
 
+import copy
+import logging
 import os
+import threading
 import zipfile
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 
+import numpy as np
 import pandas as pd
 
+try:
+    import numba
+    from numba import njit, prange
+
+    # plan() runs on worker threads; a TBB-backed parallel kernel launched
+    # from a non-main thread keeps the process from exiting at shutdown
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+except ImportError:  # run the scan kernel as plain Python
+    def njit(*args, **kwargs):
+        return lambda f: f
+    prange = range
+
+logger = logging.getLogger("bouldermove.raptor")
+
+STOP_TIMES_COLS = ("trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence")
+
+# The kernel already spreads one scan over all cores, and numba's default
+# (workqueue) threading layer aborts if parallel kernels are launched from
+# several threads at once, so plan() calls take turns on the scan.
+_scan_lock = threading.Lock()
+
+# Memoized plan() results per engine, keyed on (origin, dest, departure minute)
+PLAN_CACHE_SIZE = 4096
+
 
 def _parse_gtfs_time(t: Any) -> Optional[int]:
     """
@@ -49,6 +78,30 @@ def _parse_gtfs_time(t: Any) -> Optional[int]:
         return None
 
 
+def _parse_gtfs_times(col: pd.Series) -> pd.Series:
+    """
+    Vectorized _parse_gtfs_time over a column. int64 seconds, or float64
+    with NaN for missing/malformed entries if there are any.
+    """
+    if pd.api.types.is_numeric_dtype(col):
+        secs = col.astype(np.float64)
+        return secs if secs.isna().any() else secs.astype(np.int64)
+
+    if len(col) and pd.api.types.is_string_dtype(col) and (col.str.len() == 8).all():
+        # Fixed-width HH:MM:SS: read the digits straight from the bytes. uint8
+        # wraparound pushes anything below '0' above 9 too; ':' - '0' == 10.
+        b = np.asarray(col.array).astype("S8").view(np.uint8).reshape(-1, 8) - np.uint8(48)
+        if (b[:, [0, 1, 3, 4, 6, 7]] <= 9).all() and (b[:, [2, 5]] == 10).all():
+            b = b.astype(np.int64)
+            secs = (b[:, 0] * 10 + b[:, 1]) * 3600 + (b[:, 3] * 10 + b[:, 4]) * 60 + b[:, 6] * 10 + b[:, 7]
+            return pd.Series(secs, index=col.index)
+
+    parts = col.astype("string").str.split(":", n=2, expand=True).reindex(columns=range(3))
+    h, m, sec = (pd.to_numeric(parts[i], errors="coerce") for i in range(3))
+    secs = (h * 3600 + m * 60 + sec).astype(np.float64)
+    return secs if secs.isna().any() else secs.astype(np.int64)
+
+
 def _secs_to_hhmmss(secs: int) -> str:
     """
     Convert seconds since midnight to HH:MM:SS (mod 24h).
@@ -60,6 +113,75 @@ def _secs_to_hhmmss(secs: int) -> str:
     return f"{h:02d}:{m:02d}:{s:02d}"
 
 
+@njit(parallel=True, nogil=True, cache=True)
+def _scan_one_transfer(
+    origin_dep, origin_trip, origin_seq, dest,
+    row_stop, row_arr, row_seq, trip_offsets,
+    event_dep, event_trip, event_seq, event_offsets,
+    transfer_buffer, max_transfer_stops, max_events_per_stop,
+):
+    """
+    Earliest arrival at stop code `dest` using two trips, boarding one of
+    the given origin departures. Trips are CSR rows (trip_offsets into the
+    row_* arrays); departures per stop are CSR rows (event_offsets into the
+    event_* arrays), sorted by time.
+
+    Origin departures are scanned in parallel, each keeping its own best;
+    the earliest of those (first departure on ties) wins.
+
+    Times are int32 seconds with -1 for missing. Returns (arrival,
+    origin_k, board1, transfer, event, board2, dest_row) with global
+    row/event indexes, or arrival -1 if nothing reaches dest.
+    """
+    n_origin = len(origin_dep)
+    # per origin departure: arrival, board1, transfer, event, board2, dest_row
+    found = np.full((n_origin, 6), -1, dtype=np.int64)
+
+    for k in prange(n_origin):
+        dep1 = origin_dep[k]
+        start1 = trip_offsets[origin_trip[k]]
+        end1 = trip_offsets[origin_trip[k] + 1]
+        board1 = start1 + np.searchsorted(row_seq[start1:end1], origin_seq[k])
+
+        # potential transfer stops along this trip (skip the boarding stop)
+        for t in range(board1 + 1, min(board1 + 1 + max_transfer_stops, end1)):
+            arr1 = row_arr[t]
+            if arr1 < 0:
+                arr1 = dep1
+            transfer = row_stop[t]
+            ev_start = event_offsets[transfer]
+            ev_end = event_offsets[transfer + 1]
+            first2 = ev_start + np.searchsorted(event_dep[ev_start:ev_end], arr1 + transfer_buffer)
+
+            for j in range(first2, min(first2 + max_events_per_stop, ev_end)):
+                start2 = trip_offsets[event_trip[j]]
+                end2 = trip_offsets[event_trip[j] + 1]
+                board2 = start2 + np.searchsorted(row_seq[start2:end2], event_seq[j])
+
+                for d in range(board2, end2):
+                    if row_stop[d] == dest:
+                        arr2 = np.int64(row_arr[d])
+                        if arr2 < 0:
+                            arr2 = np.int64(event_dep[j])
+                        if found[k, 0] < 0 or arr2 < found[k, 0]:
+                            found[k, 0] = arr2
+                            found[k, 1] = board1
+                            found[k, 2] = t
+                            found[k, 3] = j
+                            found[k, 4] = board2
+                            found[k, 5] = d
+                        break
+
+    best_k = -1
+    for k in range(n_origin):
+        if found[k, 0] >= 0 and (best_k < 0 or found[k, 0] < found[best_k, 0]):
+            best_k = k
+    if best_k < 0:
+        return (np.int64(-1), -1, -1, -1, -1, -1, -1)
+    f = found[best_k]
+    return (f[0], best_k, f[1], f[2], f[3], f[4], f[5])
+
+
 class RaptorEngine:
     def __init__(
         self,
@@ -76,10 +198,12 @@ class RaptorEngine:
         self.stops_geojson_path = stops_geojson_path
         self.max_transfers = max_transfers
 
-        print("[RaptorEngine] Loading GTFS feeds...")
+        logger.info("Loading GTFS feeds...")
         self.stop_times = self._load_all_stop_times()
         self._precompute_indexes()
-        print(f"[RaptorEngine] Ready. Loaded {len(self.stop_times)} stop-times rows.")
+        # Per engine, so a reload (a new engine) starts with an empty cache
+        self._plan_cached = lru_cache(maxsize=PLAN_CACHE_SIZE)(self._plan)
+        logger.info("Ready. Loaded %d stop-times rows.", len(self.stop_times))
 
     # ------------------------------------------------------------------
     # GTFS LOADING
@@ -88,28 +212,34 @@ class RaptorEngine:
         frames = []
         for feed_path in self.gtfs_feeds:
             if not os.path.exists(feed_path):
-                print(f"[RaptorEngine] WARNING: GTFS feed not found: {feed_path}")
+                logger.warning("GTFS feed not found: %s", feed_path)
                 continue
 
             try:
                 with zipfile.ZipFile(feed_path, "r") as zf:
                     if "stop_times.txt" not in zf.namelist() or "trips.txt" not in zf.namelist():
-                        print(f"[RaptorEngine] WARNING: {feed_path} missing stop_times.txt or trips.txt")
+                        logger.warning("%s missing stop_times.txt or trips.txt", feed_path)
                         continue
 
+                    # Only parse the columns we actually need. trip_id keeps
+                    # its inferred dtype, so trips sort the same way as before.
                     with zf.open("stop_times.txt") as f_st:
-                        st = pd.read_csv(f_st)
+                        st = pd.read_csv(
+                            f_st,
+                            usecols=lambda c: c in STOP_TIMES_COLS,
+                            dtype={"stop_id": str, "arrival_time": str, "departure_time": str},
+                            engine="c",
+                        )
 
                     with zf.open("trips.txt") as f_tr:
-                        tr = pd.read_csv(f_tr)
-
-                    # Keep only columns we actually need
-                    st_cols = ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"]
-                    st = st[[c for c in st_cols if c in st.columns]].copy()
-
-                    if "route_id" in tr.columns:
-                        tr = tr[["trip_id", "route_id"]].copy()
-                    else:
+                        tr = pd.read_csv(
+                            f_tr,
+                            usecols=lambda c: c in ("trip_id", "route_id"),
+                            dtype={"route_id": str},
+                            engine="c",
+                        )
+
+                    if "route_id" not in tr.columns:
                         tr["route_id"] = ""
 
                     # Merge route_id onto stop_times
@@ -117,7 +247,7 @@ class RaptorEngine:
                     frames.append(merged)
 
             except Exception as e:
-                print(f"[RaptorEngine] ERROR reading {feed_path}: {e}")
+                logger.error("Error reading %s: %s", feed_path, e)
 
         if not frames:
             raise RuntimeError("[RaptorEngine] No valid GTFS stop_times/trips loaded.")
@@ -125,11 +255,14 @@ class RaptorEngine:
         df = pd.concat(frames, ignore_index=True)
 
         # Parse times into seconds since midnight
-        df["departure_secs"] = df["departure_time"].apply(_parse_gtfs_time)
-        df["arrival_secs"] = df["arrival_time"].apply(_parse_gtfs_time)
+        df["departure_secs"] = _parse_gtfs_times(df["departure_time"])
+        df["arrival_secs"] = _parse_gtfs_times(df["arrival_time"])
 
-        # Use departure_secs if arrival_secs is missing
+        # Use departure_secs if arrival_secs is missing; -1 marks a missing
+        # time from here on (valid GTFS times are >= 0 and fit in int32)
         df["arrival_secs"] = df["arrival_secs"].fillna(df["departure_secs"])
+        for col in ("departure_secs", "arrival_secs"):
+            df[col] = df[col].fillna(-1).astype(np.int32)
 
         # Ensure numeric stop_sequence
         df["stop_sequence"] = pd.to_numeric(df["stop_sequence"], errors="coerce")
@@ -142,18 +275,70 @@ class RaptorEngine:
 
     def _precompute_indexes(self):
         """
-        Build lookups:
-        - by_trip: trip_id -> DataFrame of its stop_times in order
-        - by_stop: stop_id -> DataFrame of all events at that stop, sorted by departure time
+        Build flat CSR-style arrays, with stop_id and trip_id factorized to
+        int codes:
+        - row_stop / row_arr / row_seq: stop_times rows in trip order; trip
+          `code` is rows trip_offsets[code]:trip_offsets[code + 1]
+        - event_dep / event_trip / event_seq: departures grouped by stop and
+          sorted by time; stop `code` is event_offsets[code]:event_offsets[code + 1]
         """
-        print("[RaptorEngine] Building trip and stop indexes...")
-        self.by_trip: Dict[str, pd.DataFrame] = {}
-        for tid, grp in self.stop_times.groupby("trip_id"):
-            self.by_trip[tid] = grp.sort_values("stop_sequence").reset_index(drop=True)
-
-        self.by_stop: Dict[str, pd.DataFrame] = {}
-        for sid, grp in self.stop_times.groupby("stop_id"):
-            self.by_stop[str(sid)] = grp.sort_values("departure_secs").reset_index(drop=True)
+        logger.info("Building trip and stop indexes...")
+        df = self.stop_times
+
+        stop_codes, stop_ids = pd.factorize(df["stop_id"].astype(str))
+        self.stop_ids = np.asarray(stop_ids, dtype=object)
+        self.stop_code: Dict[str, int] = {sid: i for i, sid in enumerate(self.stop_ids)}
+        stop_codes = stop_codes.astype(np.int32)
+
+        # stop_times is sorted by trip, so each trip is one contiguous run
+        trip_codes, trip_ids = pd.factorize(df["trip_id"])
+        trip_codes = trip_codes.astype(np.int32)
+        starts = np.flatnonzero(np.r_[True, trip_codes[1:] != trip_codes[:-1]])
+        self.trip_ids = np.array([str(t) for t in trip_ids], dtype=object)
+        self.trip_route_ids = df["route_id"].astype(str).to_numpy(dtype=object)[starts]
+
+        arr_secs = df["arrival_secs"].to_numpy(dtype=np.int32)
+        dep_secs = df["departure_secs"].to_numpy(dtype=np.int32)
+        seq = df["stop_sequence"].to_numpy(dtype=np.int64)
+        self.row_stop, self.row_arr, self.row_seq = stop_codes, arr_secs, seq
+        self.trip_offsets = np.r_[starts, len(df)].astype(np.int64)
+
+        # Per stop: rows with a departure time, ordered like
+        # DataFrame.sort_values("departure_secs") did on the int64 column, so
+        # equal departures keep the same order
+        dep_key = dep_secs.astype(np.int64)
+        by_stop = np.argsort(stop_codes, kind="stable")
+        bounds = np.searchsorted(stop_codes[by_stop], np.arange(len(self.stop_ids) + 1))
+        event_rows = []
+        for code in range(len(self.stop_ids)):
+            rows = by_stop[bounds[code]:bounds[code + 1]]
+            rows = rows[dep_secs[rows] >= 0]
+            event_rows.append(rows[np.argsort(dep_key[rows], kind="quicksort")])
+        self.event_offsets = np.r_[0, np.cumsum([len(r) for r in event_rows])].astype(np.int64)
+        event_rows = np.concatenate(event_rows)
+        self.event_dep = dep_secs[event_rows]
+        self.event_trip = trip_codes[event_rows]
+        self.event_seq = seq[event_rows]
+
+    def _trip_segment(self, trip_code, board_seq):
+        """
+        Stop codes and arrival times of a trip, and the index of its first
+        stop_time at or after board_seq.
+        """
+        s, e = self.trip_offsets[trip_code], self.trip_offsets[trip_code + 1]
+        return self.row_stop[s:e], self.row_arr[s:e], int(np.searchsorted(self.row_seq[s:e], board_seq))
+
+    def _make_leg(self, from_stop, to_stop, dep_secs, arr_secs, trip_code, stops):
+        return {
+            "mode": "TRANSIT",
+            "from_stop": from_stop,
+            "to_stop": to_stop,
+            "departure": _secs_to_hhmmss(dep_secs),
+            "arrival": _secs_to_hhmmss(arr_secs),
+            "trip_id": self.trip_ids[trip_code],
+            "route_id": self.trip_route_ids[trip_code],
+            "intermediate_stops": self.stop_ids[stops].tolist(),
+        }
 
     # ------------------------------------------------------------------
     # PLANNING
@@ -194,19 +379,33 @@ class RaptorEngine:
         else:
             t0 = 0  # midnight
 
-        if origin_stop_id not in self.by_stop:
-            print(f"[RaptorEngine] No data for origin stop_id={origin_stop_id}")
+        # Cache on the minute, rounded up so a cached plan never departs
+        # before the requested time. Legs are copied so callers can't
+        # modify the cached ones.
+        t0_minute = -(-t0 // 60)
+        return copy.deepcopy(self._plan_cached(origin_stop_id, dest_stop_id, t0_minute))
+
+    def _plan(self, origin_stop_id: str, dest_stop_id: str, t0_minute: int):
+        """plan() for a departure at t0_minute minutes after midnight."""
+        t0 = t0_minute * 60
+
+        origin = self.stop_code.get(origin_stop_id)
+        if origin is None:
+            logger.debug("No data for origin stop_id=%s", origin_stop_id)
+            return []
+        dest = self.stop_code.get(dest_stop_id)
+        if dest is None:
+            logger.debug("No 0- or 1-transfer journey from %s to %s", origin_stop_id, dest_stop_id)
             return []
 
-        events_at_origin = self.by_stop[origin_stop_id]
         # Only consider departures after requested time
-        candidates = events_at_origin[
-            events_at_origin["departure_secs"].notna()
-            & (events_at_origin["departure_secs"] >= t0)
-        ]
+        s, e = self.event_offsets[origin], self.event_offsets[origin + 1]
+        origin_dep, origin_trips, origin_seq = self.event_dep[s:e], self.event_trip[s:e], self.event_seq[s:e]
+        first = int(np.searchsorted(origin_dep, t0))
+        n_origin = len(origin_dep)
 
-        if candidates.empty:
-            print(f"[RaptorEngine] No departures from stop {origin_stop_id} after t0={_secs_to_hhmmss(t0)}")
+        if first == n_origin:
+            logger.debug("No departures from stop %s after t0=%s", origin_stop_id, _secs_to_hhmmss(t0))
             return []
 
         # You can tune these caps if performance is a problem
@@ -216,133 +415,64 @@ class RaptorEngine:
         TRANSFER_BUFFER_SECS = 120  # 2 minutes
 
         # ---------- 0-transfer search ----------
+        # Track only the winning boarding; its leg is built after the scan
         best_arrival_0 = float("inf")
         best_leg_0: Dict[str, Any] | None = None
+        best_k0 = best_board0 = best_d0 = -1
 
-        cand0 = candidates  # no .head() cap for now
-        for _, board_row in cand0.iterrows():
-            trip_id = board_row["trip_id"]
-            dep_secs = int(board_row["departure_secs"])
-            board_seq = int(board_row["stop_sequence"])
+        for k in range(first, n_origin):  # no cap for now
+            stops, arr, board = self._trip_segment(origin_trips[k], origin_seq[k])
 
-            trip_df = self.by_trip.get(trip_id)
-            if trip_df is None:
+            hits = np.flatnonzero(stops[board:] == dest)
+            if hits.size == 0:
                 continue
 
-            seg = trip_df[trip_df["stop_sequence"] >= board_seq]
-            seg_dest = seg[seg["stop_id"].astype(str) == dest_stop_id]
-            if seg_dest.empty:
-                continue
-
-            dest_row = seg_dest.iloc[0]
-            arr_secs = int(dest_row["arrival_secs"]) if not pd.isna(dest_row["arrival_secs"]) else dep_secs
+            d = board + hits[0]
+            arr_secs = arr[d] if arr[d] >= 0 else origin_dep[k]
 
             if arr_secs < best_arrival_0:
                 best_arrival_0 = arr_secs
-                seg_path = seg[seg["stop_sequence"] <= dest_row["stop_sequence"]]
-                intermediate_stops = seg_path["stop_id"].astype(str).tolist()
-
-                best_leg_0 = {
-                    "mode": "TRANSIT",
-                    "from_stop": origin_stop_id,
-                    "to_stop": dest_stop_id,
-                    "departure": _secs_to_hhmmss(dep_secs),
-                    "arrival": _secs_to_hhmmss(arr_secs),
-                    "trip_id": str(trip_id),
-                    "route_id": str(dest_row.get("route_id", "")),
-                    "intermediate_stops": intermediate_stops,
-                }
+                best_k0, best_board0, best_d0 = k, board, d
+
+        if best_k0 >= 0:
+            trip = origin_trips[best_k0]
+            stops, _, _ = self._trip_segment(trip, origin_seq[best_k0])
+            best_leg_0 = self._make_leg(
+                origin_stop_id, dest_stop_id, origin_dep[best_k0], best_arrival_0,
+                trip, stops[best_board0:best_d0 + 1],
+            )
 
         # ---------- 1-transfer search (if allowed) ----------
         best_arrival_1 = float("inf")
         best_legs_1: List[Dict[str, Any]] | None = None
 
         if self.max_transfers >= 1:
-            cand1 = candidates.head(MAX_ORIGIN_EVENTS)
-
-            for _, board_row in cand1.iterrows():
-                trip1_id = board_row["trip_id"]
-                dep1_secs = int(board_row["departure_secs"])
-                board1_seq = int(board_row["stop_sequence"])
-
-                trip1_df = self.by_trip.get(trip1_id)
-                if trip1_df is None:
-                    continue
-
-                # segment of first trip from boarding point onward
-                seg1 = trip1_df[trip1_df["stop_sequence"] >= board1_seq].reset_index(drop=True)
-
-                # potential transfer stops along this trip
-                # (skip the very first row because that's the boarding stop)
-                for i, trans_row in seg1.iloc[1:MAX_TRANSFER_STOPS_PER_TRIP1 + 1].iterrows():
-                    transfer_stop = str(trans_row["stop_id"])
-                    arr1_secs = int(trans_row["arrival_secs"]) if not pd.isna(trans_row["arrival_secs"]) else dep1_secs
-                    earliest_board2 = arr1_secs + TRANSFER_BUFFER_SECS
-
-                    # events at transfer stop
-                    events_at_transfer = self.by_stop.get(transfer_stop)
-                    if events_at_transfer is None:
-                        continue
-
-                    events2 = events_at_transfer[
-                        events_at_transfer["departure_secs"].notna()
-                        & (events_at_transfer["departure_secs"] >= earliest_board2)
-                    ].head(MAX_EVENTS_PER_TRANSFER_STOP)
-
-                    if events2.empty:
-                        continue
-
-                    for _, board2_row in events2.iterrows():
-                        trip2_id = board2_row["trip_id"]
-                        dep2_secs = int(board2_row["departure_secs"])
-                        board2_seq = int(board2_row["stop_sequence"])
-
-                        trip2_df = self.by_trip.get(trip2_id)
-                        if trip2_df is None:
-                            continue
-
-                        seg2 = trip2_df[trip2_df["stop_sequence"] >= board2_seq].reset_index(drop=True)
-                        seg2_dest = seg2[seg2["stop_id"].astype(str) == dest_stop_id]
-                        if seg2_dest.empty:
-                            continue
-
-                        dest2_row = seg2_dest.iloc[0]
-                        arr2_secs = int(dest2_row["arrival_secs"]) if not pd.isna(dest2_row["arrival_secs"]) else dep2_secs
-
-                        if arr2_secs < best_arrival_1:
-                            best_arrival_1 = arr2_secs
-
-                            # path of first leg: origin -> transfer
-                            seg1_path = seg1[seg1["stop_sequence"] <= trans_row["stop_sequence"]]
-                            leg1_stops = seg1_path["stop_id"].astype(str).tolist()
-
-                            # path of second leg: transfer -> dest
-                            seg2_path = seg2[seg2["stop_sequence"] <= dest2_row["stop_sequence"]]
-                            leg2_stops = seg2_path["stop_id"].astype(str).tolist()
-
-                            leg1 = {
-                                "mode": "TRANSIT",
-                                "from_stop": origin_stop_id,
-                                "to_stop": transfer_stop,
-                                "departure": _secs_to_hhmmss(dep1_secs),
-                                "arrival": _secs_to_hhmmss(arr1_secs),
-                                "trip_id": str(trip1_id),
-                                "route_id": str(trans_row.get("route_id", "")),
-                                "intermediate_stops": leg1_stops,
-                            }
-
-                            leg2 = {
-                                "mode": "TRANSIT",
-                                "from_stop": transfer_stop,
-                                "to_stop": dest_stop_id,
-                                "departure": _secs_to_hhmmss(dep2_secs),
-                                "arrival": _secs_to_hhmmss(arr2_secs),
-                                "trip_id": str(trip2_id),
-                                "route_id": str(dest2_row.get("route_id", "")),
-                                "intermediate_stops": leg2_stops,
-                            }
-
-                            best_legs_1 = [leg1, leg2]
+            last = min(first + MAX_ORIGIN_EVENTS, n_origin)
+            with _scan_lock:
+                arr2_secs, k, board1, t, j, board2, d = _scan_one_transfer(
+                    origin_dep[first:last], origin_trips[first:last], origin_seq[first:last], dest,
+                    self.row_stop, self.row_arr, self.row_seq, self.trip_offsets,
+                    self.event_dep, self.event_trip, self.event_seq, self.event_offsets,
+                    TRANSFER_BUFFER_SECS, MAX_TRANSFER_STOPS_PER_TRIP1, MAX_EVENTS_PER_TRANSFER_STOP,
+                )
+
+            if arr2_secs >= 0:
+                best_arrival_1 = arr2_secs
+                dep1_secs = origin_dep[first + k]
+                arr1_secs = self.row_arr[t] if self.row_arr[t] >= 0 else dep1_secs
+                transfer_stop = self.stop_ids[self.row_stop[t]]
+
+                # first leg: origin -> transfer, second: transfer -> dest
+                best_legs_1 = [
+                    self._make_leg(
+                        origin_stop_id, transfer_stop, dep1_secs, arr1_secs,
+                        origin_trips[first + k], self.row_stop[board1:t + 1],
+                    ),
+                    self._make_leg(
+                        transfer_stop, dest_stop_id, self.event_dep[j], best_arrival_1,
+                        self.event_trip[j], self.row_stop[board2:d + 1],
+                    ),
+                ]
 
         # ---------- choose best among 0- and 1-transfer ----------
         best_overall_arrival = float("inf")
@@ -357,7 +487,7 @@ class RaptorEngine:
             best_legs = best_legs_1
 
         if best_legs is None:
-            print(f"[RaptorEngine] No 0- or 1-transfer journey from {origin_stop_id} to {dest_stop_id}")
+            logger.debug("No 0- or 1-transfer journey from %s to %s", origin_stop_id, dest_stop_id)
             return []
 
         return best_legs
@@ -1,20 +1,24 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
+from dotenv import load_dotenv
 import pandas as pd
 from joblib import dump
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score, accuracy_score
 from google.cloud import storage
 from xgboost import XGBClassifier
+from onnxmltools import convert_xgboost
+from onnxmltools.convert.common.data_types import FloatTensorType
 import numpy as np
 
 # ------- SQL connection -------
-conn = psycopg2.connect(
-    host="35.239.113.255",
-    dbname="bouldermove",
-    user="boulder_user",
-    password="RheaisMad",
-    port=5432,
-)
+# Connection settings come from the environment (or .env): PG_DSN as a libpq
+# connection string, or the standard PGHOST/PGDATABASE/PGUSER/PGPASSWORD
+# variables when it is unset
+load_dotenv()
+conn = psycopg2.connect(os.getenv("PG_DSN", ""))
 
 query = """
 SELECT
@@ -32,8 +36,20 @@ SELECT
 FROM trip_history;
 """
 
-df = pd.read_sql(query, conn)
+# Server-side CSV COPY instead of fetching row by row through the DB-API
+buf = io.StringIO()
+with conn.cursor() as cur:
+    cur.copy_expert(f"COPY ({query.strip().rstrip(';')}) TO STDOUT WITH CSV HEADER", buf)
 conn.close()
+buf.seek(0)
+
+float_cols = ["duration_min", "buffer_min", "rain_1h", "snow_1h", "wind_speed", "temp", "event_risk"]
+df = pd.read_csv(
+    buf,
+    dtype={**{c: "float32" for c in float_cols}, "num_transfers": "int32", "hour": "int32"},
+    true_values=["t"],
+    false_values=["f"],
+)
 
 # ------- Feature prep -------
 feature_cols = [
@@ -49,8 +65,12 @@ feature_cols = [
     "is_weekend",
 ]
 
-X = df[feature_cols]
-y = df["on_time"].astype(int)
+# float32 end to end: halves the memory the histogram builder streams over,
+# and matches the float32 input of the exported ONNX model. Plain contiguous
+# arrays go straight into XGBoost's QuantileDMatrix (hist) without the
+# DataFrame adapter.
+X = df[feature_cols].to_numpy(dtype=np.float32)
+y = df["on_time"].to_numpy(dtype=np.int8)
 
 # ------- Train/test split -------
 X_train, X_test, y_train, y_test = train_test_split(
@@ -58,6 +78,9 @@ X_train, X_test, y_train, y_test = train_test_split(
 )
 
 # ------- XGBoost Model (Tuned) -------
+# XGB_DEVICE=cuda trains on the GPU (XGBoost >= 2.0)
+XGB_DEVICE = os.getenv("XGB_DEVICE", "cpu")
+
 model = XGBClassifier(
     n_estimators=600,
     learning_rate=0.03,
@@ -71,6 +94,8 @@ model = XGBClassifier(
     objective="binary:logistic",
     eval_metric="auc",
     tree_method="hist",
+    device=XGB_DEVICE,
+    max_bin=128,
     random_state=42
 )
 
@@ -83,11 +108,12 @@ model.fit(
 
 # ------- Evaluation -------
 train_pred = model.predict(X_train)
-test_pred = model.predict(X_test)
+test_proba = model.predict_proba(X_test)[:, 1]
+test_pred = (test_proba > 0.5).astype(np.int8)
 
 train_acc = accuracy_score(y_train, train_pred)
 test_acc = accuracy_score(y_test, test_pred)
-test_auc = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+test_auc = roc_auc_score(y_test, test_proba)
 
 print("Train accuracy:", train_acc)
 print("Test accuracy:", test_acc)
@@ -97,11 +123,25 @@ print("ROC-AUC:", test_auc)
 #   SAVE MODEL CORRECTLY FOR CLOUD RUN (NO PICKLE!)
 # ==============================================================
 
-# Save XGBoost model to native JSON format (portable across versions)
-model.save_model("route_on_time_model.json")
+# Artifacts are serialized in memory and uploaded directly; nothing is
+# written to local disk first.
+
+# Save XGBoost model to native JSON format (portable across versions). It
+# was trained on bare arrays, so attach the column names for readers.
+model.get_booster().feature_names = feature_cols
+model_json = bytes(model.get_booster().save_raw(raw_format="json"))
 
 # Save features list separately
-dump(feature_cols, "feature_cols.joblib")
+feat_buf = io.BytesIO()
+dump(feature_cols, feat_buf)
+
+# ONNX export for serving. The converter only understands the default
+# f0..fN feature names, so drop the DataFrame column names first; inputs are
+# positional in feature_cols order.
+model.get_booster().feature_names = None
+onnx_model = convert_xgboost(
+    model, initial_types=[("input", FloatTensorType([None, len(feature_cols)]))]
+)
 
 # ==============================================================
 #   UPLOAD TO GOOGLE CLOUD STORAGE
@@ -110,14 +150,24 @@ dump(feature_cols, "feature_cols.joblib")
 client = storage.Client()
 bucket = client.bucket("bouldermove-ml-artifacts")
 
-# Upload model
-blob_model = bucket.blob("models/route_on_time_model.json")
-blob_model.upload_from_filename("route_on_time_model.json")
+# Upload model JSON, ONNX model (what the scoring service loads) and the
+# feature columns list concurrently instead of one after another
+artifacts = {
+    "models/route_on_time_model.json": model_json,
+    "models/route_on_time_model.onnx": onnx_model.SerializeToString(),
+    "models/feature_cols.joblib": feat_buf.getvalue(),
+}
+
+
+def upload_artifact(item):
+    name, data = item
+    bucket.blob(name).upload_from_string(data, content_type="application/octet-stream")
+
 
-# Upload feature columns list
-blob_feat = bucket.blob("models/feature_cols.joblib")
-blob_feat.upload_from_filename("feature_cols.joblib")
+with ThreadPoolExecutor(max_workers=len(artifacts)) as pool:
+    list(pool.map(upload_artifact, artifacts.items()))
 
 print("Uploaded model + feature columns to GCS:")
 print("  - gs://bouldermove-ml-artifacts/models/route_on_time_model.json")
+print("  - gs://bouldermove-ml-artifacts/models/route_on_time_model.onnx")
 print("  - gs://bouldermove-ml-artifacts/models/feature_cols.joblib")
@@ -1,92 +1,113 @@
 # backend/weather_service.py
 import os
+from threading import Lock
+
+import orjson
 import requests
+from cachetools import TTLCache, cached
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 load_dotenv()
 
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+# Pooled keep-alive connections to OpenWeather, so repeated lookups skip the
+# TCP/TLS handshake.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+HTTP_TIMEOUT_S = 5
+
+# Current conditions change on the order of minutes, so callers within the
+# same ~1 km cell (lat/lon rounded to 2 decimals) share one response.
+WEATHER_CACHE_TTL_S = 300
+_weather_cache = TTLCache(maxsize=1024, ttl=WEATHER_CACHE_TTL_S)
 
 
 class WeatherError(Exception):
     pass
 
 
+# ---- CUSTOM ALERT RULES ----
+# Alert dicts are built once at import and shared by every call, so treat
+# the returned alerts as read-only.
+RAIN_HIGH_ALERT = {
+    "severity": "high",
+    "title": "Heavy rain on your route",
+    "message": "Expect slower traffic and possible delays due to heavy rainfall.",
+    "type": "rain",
+}
+RAIN_LOW_ALERT = {
+    "severity": "medium",
+    "title": "Light rain",
+    "message": "Carry an umbrella. Minor slowdowns are possible.",
+    "type": "rain",
+}
+SNOW_ALERT = {
+    "severity": "high",
+    "title": "Snow conditions",
+    "message": "Snow on the route can cause significant delays.",
+    "type": "snow",
+}
+WIND_ALERT = {
+    "severity": "medium",
+    "title": "Strong winds",
+    "message": "Buses may drive slower in strong wind conditions.",
+    "type": "wind",
+}
+COLD_ALERT = {
+    "severity": "medium",
+    "title": "Very low temperature",
+    "message": "Standing at stops may be uncomfortable.",
+    "type": "cold",
+}
+HEAT_ALERT = {
+    "severity": "medium",
+    "title": "High temperature",
+    "message": "Heat may cause discomfort and minor delays.",
+    "type": "heat",
+}
+STORM_ALERT = {
+    "severity": "high",
+    "title": "Thunderstorm nearby",
+    "message": "Storms can lead to disruptions and delays.",
+    "type": "storm",
+}
+
+# (predicate, alert) pairs, checked in order against the normalized inputs
+RULES = (
+    (lambda c: c["rain_1h"] >= 2, RAIN_HIGH_ALERT),
+    (lambda c: 0 < c["rain_1h"] < 2, RAIN_LOW_ALERT),
+    (lambda c: c["snow_1h"] > 0, SNOW_ALERT),
+    (lambda c: c["wind_speed"] >= 10, WIND_ALERT),
+    (lambda c: c["temp"] is not None and c["temp"] <= -5, COLD_ALERT),
+    (lambda c: c["temp"] is not None and c["temp"] >= 35, HEAT_ALERT),
+    (lambda c: c["weather_main"] == "Thunderstorm", STORM_ALERT),
+)
+
+
 def build_custom_alerts(current: dict) -> list[dict]:
     """
     Build simple, high level alerts from current weather data.
     'current' here is a dict with keys:
       temp, wind_speed, rain_1h, snow_1h, weather_main
     """
-    alerts = []
-
-    temp = current.get("temp")
-    wind_speed = current.get("wind_speed", 0)
-    rain_1h = current.get("rain_1h", 0.0)
-    snow_1h = current.get("snow_1h", 0.0)
-    weather_main = current.get("weather_main")
-
-    if rain_1h >= 2:
-        alerts.append({
-            "severity": "high",
-            "title": "Heavy rain on your route",
-            "message": "Expect slower traffic and possible delays due to heavy rainfall.",
-            "type": "rain",
-        })
-    elif rain_1h > 0:
-        alerts.append({
-            "severity": "medium",
-            "title": "Light rain",
-            "message": "Carry an umbrella. Minor slowdowns are possible.",
-            "type": "rain",
-        })
-
-    if snow_1h > 0:
-        alerts.append({
-            "severity": "high",
-            "title": "Snow conditions",
-            "message": "Snow on the route can cause significant delays.",
-            "type": "snow",
-        })
-
-    if wind_speed >= 10:
-        alerts.append({
-            "severity": "medium",
-            "title": "Strong winds",
-            "message": "Buses may drive slower in strong wind conditions.",
-            "type": "wind",
-        })
-
-    if temp is not None:
-        if temp <= -5:
-            alerts.append({
-                "severity": "medium",
-                "title": "Very low temperature",
-                "message": "Standing at stops may be uncomfortable.",
-                "type": "cold",
-            })
-        elif temp >= 35:
-            alerts.append({
-                "severity": "medium",
-                "title": "High temperature",
-                "message": "Heat may cause discomfort and minor delays.",
-                "type": "heat",
-            })
-
-    if weather_main == "Thunderstorm":
-        alerts.append({
-            "severity": "high",
-            "title": "Thunderstorm nearby",
-            "message": "Storms can lead to disruptions and delays.",
-            "type": "storm",
-        })
-
-    return alerts
+    c = {
+        "temp": current.get("temp"),
+        "wind_speed": current.get("wind_speed", 0),
+        "rain_1h": current.get("rain_1h", 0.0),
+        "snow_1h": current.get("snow_1h", 0.0),
+        "weather_main": current.get("weather_main"),
+    }
+    return [alert for pred, alert in RULES if pred(c)]
 
 
+@cached(_weather_cache, key=lambda lat, lon: (round(lat, 2), round(lon, 2)), lock=Lock())
 def get_weather_and_alerts(lat: float, lon: float) -> dict:
     """
     Uses the simple Current Weather API (2.5/weather).
+    Results are cached for WEATHER_CACHE_TTL_S seconds per rounded lat/lon.
     Returns:
       - current: compact weather info
       - api_alerts: []  (not available in this endpoint)
@@ -95,7 +116,6 @@ def get_weather_and_alerts(lat: float, lon: float) -> dict:
     if not OPENWEATHER_API_KEY:
         raise WeatherError("OPENWEATHER_API_KEY not set. Did you create .env?")
 
-    url = "https://api.openweathermap.org/data/2.5/weather"
     params = {
         "lat": lat,
         "lon": lon,
@@ -104,14 +124,14 @@ def get_weather_and_alerts(lat: float, lon: float) -> dict:
     }
 
     try:
-        resp = requests.get(url, params=params, timeout=5)
+        resp = SESSION.get(OPENWEATHER_URL, params=params, timeout=HTTP_TIMEOUT_S)
     except requests.RequestException as e:
         raise WeatherError(f"Network error calling OpenWeather: {e}")
 
     if resp.status_code != 200:
         raise WeatherError(f"OpenWeather error {resp.status_code}: {resp.text}")
 
-    data = resp.json()
+    data = orjson.loads(resp.content)
 
     current_compact = {
         "temp": data["main"]["temp"],